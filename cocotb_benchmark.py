@@ -0,0 +1,465 @@
+# CocoTB. Simulator-free benchmarks
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, Iterable, List
+import numpy
+
+from cocotb_util.cocotb_transaction import Transaction, TrxPool
+from cocotb_util.cocotb_trx_generator import TrxGenerator
+from cocotb_util.cocotb_driver import BusDriver
+from cocotb_util.cocotb_monitor import BusMonitor
+from cocotb_util.cocotb_scoreboard import Scoreboard
+from cocotb_util.cocotb_coverage_processor import CoverProcessor
+from cocotb_util.cocotb_coverage import CoverPoint, CoverCross
+from cocotb_util.cocotb_probe import probe_manager
+from cocotb_util.cocotb_util import assign_probe_str, assign_probe_int
+from cocotb_util.cocotb_mock import MockHandle, MockClock, MockEntity, mock_scheduler
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+SCHEMA_VERSION = 1
+
+
+class MockDut(MockEntity):
+    """Wire from 'in_*' to 'out_*' bus with optional reorder: input beats are put out in reversed order
+        by blocks of 'reorder + 1' beats, so no beat is displaced by more than 'reorder' positions"""
+
+    def __init__(self, name: str, fields: Dict[str, int], reorder: int = 0):
+        signals = {}
+        for bus in ('in', 'out'):
+            signals[f'{bus}_valid'] = 1
+            signals.update((f'{bus}_{field}', width) for field, width in fields.items())
+        super().__init__(name, signals)
+        self.block = reorder + 1
+        self._in_handles = [getattr(self, f'in_{field}') for field in fields]
+        self._out_handles = [getattr(self, f'out_{field}') for field in fields]
+        self._in = []
+        self._out = deque()
+
+    @property
+    def idle(self) -> bool:
+        return not self._in and not self._out
+
+    def flush(self):
+        """Put out incomplete reorder block"""
+        self._out.extend(reversed(self._in))
+        self._in = []
+
+    def step(self):
+        if self.in_valid._value:
+            self._in.append([handle._value for handle in self._in_handles])
+            if len(self._in) == self.block:
+                self.flush()
+        if self._out:
+            for handle, val in zip(self._out_handles, self._out.popleft()):
+                handle.value = val
+            self.out_valid.value = 1
+        else:
+            self.out_valid.value = 0
+
+
+class BenchTrx(Transaction):
+    """Benchmark trx: 'dims' random fields f0, f1, ... of 'bins' values and 'width' bits random 'data'.
+        Concrete classes are created by make_trx_cls()."""
+
+    dims = 0
+    bins = 0
+    width = 0
+
+    def __init__(self):
+        super().__init__(reset_store_trx_file=False)
+        for d in range(self.dims):
+            self.add_rand(f'f{d}', list(range(self.bins)))
+
+    def post_randomize(self):
+        self.data = random.getrandbits(self.width)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self._items_getter(self) == other._items_getter(other)
+
+    __hash__ = Transaction.__hash__
+
+
+def make_trx_cls(dims: int, bins: int, width: int) -> type:
+    assert 0 < width <= 64, "Payload width should be 1..64 bits (monitor samples are uint64)"
+    fields = tuple(f'f{d}' for d in range(dims)) + ('data',)
+    return type(f'BenchTrx_{dims}x{bins}_{width}', (BenchTrx,),
+                {'__slots__': fields, 'dims': dims, 'bins': bins, 'width': width})
+
+
+def _trx_fields(Trx: type) -> Dict[str, int]:
+    """{field: bus signal width}"""
+    return {field: (Trx.width if field == 'data' else max(Trx.bins - 1, 1).bit_length()) for field in Trx._items}
+
+
+class BenchDriver(BusDriver):
+    """Trx are assigned to bus by 'drive()' every clock (driver thread isn't run)"""
+
+
+class BenchMonitor(BusMonitor):
+    """Per trx mode: 'capture()' is called every clock instead of awaiting 'receive()'"""
+
+    def capture(self):
+        if not self.bus.valid.value:
+            return
+        trx = self.trx_pool.acquire(self.trx_cls)
+        for field in trx._items:
+            setattr(trx, field, getattr(self.bus, field).value)
+        self._recv(trx)
+
+
+class BenchCoverage(CoverProcessor):
+    """Cover points of every random field and 'data' (16 buckets), cross of random fields ('dims' > 1)"""
+
+    def __init__(self, name: str, Trx: type, dense: bool = False):
+        self.prefix = name
+        self.Trx = Trx
+        self.dense = dense
+        super().__init__(name=name, trx=Trx, report_cfg={'status': {'trx': 1 << 62}, 'final': {}})
+
+    def define(self):
+        items = []
+        for d in range(self.Trx.dims):
+            items.append(CoverPoint(f'{self.prefix}.f{d}', xf=lambda trx, d=d: getattr(trx, f'f{d}'),
+                                    bins=list(range(self.Trx.bins)), field=f'f{d}'))
+        shift = max(self.Trx.width - 16, 0)  # payload is bucketed by upper bits
+        items.append(CoverPoint(f'{self.prefix}.data', xf=lambda trx: trx.data >> shift,
+                                vxf=lambda columns: columns['data'] >> numpy.uint64(shift),
+                                buckets=(0, (1 << (self.Trx.width - shift)) - 1, 16)))
+        if self.Trx.dims > 1:
+            items.append(CoverCross(f'{self.prefix}.cross', items=[f'{self.prefix}.f{d}' for d in range(self.Trx.dims)],
+                                    log_closure=False, dense=self.dense))
+        self.add_cover_items(*items)
+
+
+_name_cnt = itertools.count()
+
+
+def _unique_name() -> str:
+    """Cover items names are global: every benchmark run gets own ones"""
+    return f'benchmark.run{next(_name_cnt)}'
+
+
+def _draw_values(Trx: type, n: int) -> Dict[str, numpy.ndarray]:
+    rng = numpy.random.default_rng(numpy.random.randint(2 ** 31))
+    values = {f'f{d}': rng.integers(0, Trx.bins, n, dtype=numpy.uint64) for d in range(Trx.dims)}
+    values['data'] = rng.integers(0, (1 << Trx.width) - 1, n, dtype=numpy.uint64, endpoint=True)
+    return values
+
+
+def _reorder_blocks(n: int, reorder: int) -> Iterable[List[int]]:
+    """Received trx indexes: reversed blocks of 'reorder + 1' trx (see MockDut)"""
+    for start in range(0, n, reorder + 1):
+        yield list(reversed(range(start, min(start + reorder + 1, n))))
+
+
+def bench_transaction(p: dict) -> float:
+    """Randomize (crv or TrxGenerator), snapshot to pool and back, to_dict"""
+    Trx = make_trx_cls(p['dims'], p['bins'], p['width'])
+    trx = Trx()
+    pool = TrxPool()
+    seq = TrxGenerator(trx, batch_size=p['batch'] or 1024) if p['generator'] else trx
+    start = time.perf_counter()
+    for _ in range(p['trx']):
+        seq.randomize()
+        pool.release(trx.snapshot(pool))
+        trx.to_dict()
+    return time.perf_counter() - start
+
+
+def bench_coverage(p: dict) -> float:
+    """CoverProcessor sampling: 'collect()' per trx or 'collect_batch()' of field columns ('batch' > 0)"""
+    Trx = make_trx_cls(p['dims'], p['bins'], p['width'])
+    coverage = BenchCoverage(_unique_name(), Trx, dense=p['dense'])
+    values = _draw_values(Trx, p['trx'])
+    n = p['trx']
+    if p['batch']:
+        start = time.perf_counter()
+        for pos in range(0, n, p['batch']):
+            coverage.collect_batch(columns={field: column[pos:pos + p['batch']] for field, column in values.items()})
+    else:
+        trx = Trx()
+        lists = {field: column.tolist() for field, column in values.items()}
+        start = time.perf_counter()
+        for i in range(n):
+            for field, column in lists.items():
+                setattr(trx, field, column[i])
+            coverage.collect(trx)
+    return time.perf_counter() - start
+
+
+def bench_scoreboard(p: dict) -> float:
+    """Scoreboard matching of pooled trx snapshots received in reordered blocks (ordered or keyed matching)"""
+    Trx = make_trx_cls(p['dims'], p['bins'], p['width'])
+    pool = TrxPool()
+    dut = MockDut('dut', _trx_fields(Trx), p['reorder'])
+    with mock_scheduler():
+        monitor = BenchMonitor(dut, signals=['valid'] + list(Trx._items), name='out', clock=MockClock(),
+                               snapshot_expected=True, trx_pool=pool, trx_cls=Trx)
+    scoreboard = _add_scoreboard(dut, monitor, Trx, p, pool)
+    values = {field: column.tolist() for field, column in _draw_values(Trx, p['trx']).items()}
+    trx = Trx()
+    start = time.perf_counter()
+    for block in _reorder_blocks(p['trx'], p['reorder']):
+        for i in sorted(block):
+            for field, column in values.items():
+                setattr(trx, field, column[i])
+            monitor.add_expected(trx)
+        for i in block:
+            got = pool.acquire(Trx)
+            for field, column in values.items():
+                setattr(got, field, column[i])
+            monitor._recv(got)
+    elapsed = time.perf_counter() - start
+    _check_scoreboard(scoreboard, monitor)
+    return elapsed
+
+
+def bench_probe(p: dict) -> float:
+    """assign_probe_str() of changing messages and assign_probe_int() with redundant writes"""
+    str_probe = MockHandle('probe_str', 256)
+    int_probe = MockHandle('probe_int', 32)
+    enabled, deferred = probe_manager.enabled, probe_manager.deferred
+    probe_manager.enabled, probe_manager.deferred = True, False  # no scheduler to flush deferred writes
+    probe_manager.reset()
+    try:
+        start = time.perf_counter()
+        for i in range(p['trx']):
+            assign_probe_str(str_probe, f'trx {i}')
+            assign_probe_int(int_probe, i >> 2)
+        return time.perf_counter() - start
+    finally:
+        probe_manager.enabled, probe_manager.deferred = enabled, deferred
+        probe_manager.reset()
+
+
+def bench_pipeline(p: dict) -> float:
+    """Sequencer -> driver -> DUT model (wire with reorder) -> monitor -> scoreboard + coverage, one trx per clock.
+        Monitor samples bus by batches ('batch' > 0, coverage by 'collect_batch()') or decodes trx every clock."""
+    Trx = make_trx_cls(p['dims'], p['bins'], p['width'])
+    pool = TrxPool()
+    clock = MockClock()
+    dut = MockDut('dut', _trx_fields(Trx), p['reorder'])
+    signals = ['valid'] + list(Trx._items)
+    with mock_scheduler():
+        driver = BenchDriver(dut, signals=signals, name='in', clock=clock)
+        monitor = BenchMonitor(dut, signals=signals, name='out', clock=clock, snapshot_expected=True, trx_pool=pool,
+                               trx_cls=Trx, sample_batch=p['batch'] or None)
+    coverage = BenchCoverage(_unique_name(), Trx, dense=p['dense'])
+    if p['batch']:
+        monitor.add_batch_callback(lambda trxs, columns: coverage.collect_batch(trxs, columns))
+    else:
+        monitor.add_callback(coverage.collect)
+    scoreboard = _add_scoreboard(dut, monitor, Trx, p, pool)
+    clock.add_edge_callback(dut.step)
+    clock.add_edge_callback(monitor.sample if p['batch'] else monitor.capture)
+
+    trx = Trx()
+    seq = TrxGenerator(trx, batch_size=p['batch'] or 1024) if p['generator'] else trx
+    valid = driver.bus.valid
+    start = time.perf_counter()
+    for _ in range(p['trx']):
+        seq.randomize()
+        monitor.add_expected(trx)
+        driver.check_trx(trx)
+        driver.drive(trx)
+        valid.value = 1
+        clock.tick()
+    valid.value = 0
+    clock.tick()
+    dut.flush()
+    while not dut.idle:
+        clock.tick()
+    clock.tick()
+    monitor.flush_samples()
+    elapsed = time.perf_counter() - start
+    _check_scoreboard(scoreboard, monitor)
+    return elapsed
+
+
+def _add_scoreboard(dut, monitor, Trx: type, p: dict, pool: TrxPool) -> Scoreboard:
+    scoreboard = Scoreboard(dut)
+    if p['match'] == 'keyed':
+        scoreboard.add_interface(monitor, monitor.expected, key_fn=Trx._items_getter, recycle=pool)
+    else:
+        scoreboard.add_interface(monitor, monitor.expected, reorder_depth=p['reorder'], recycle=pool)
+    return scoreboard
+
+
+def _check_scoreboard(scoreboard: Scoreboard, monitor):
+    """Benchmarked pipeline should work: every trx matched"""
+    assert scoreboard.errors == 0, "Scoreboard errors"
+    pending = len(monitor.expected) + len(scoreboard.keyed.get(monitor, ()))
+    assert pending == 0, f"{pending} expected trx weren't received"
+
+
+CASES = {
+    'transaction': (bench_transaction, ('trx', 'dims', 'bins', 'width', 'generator', 'batch')),
+    'coverage': (bench_coverage, ('trx', 'dims', 'bins', 'width', 'batch', 'dense')),
+    'scoreboard': (bench_scoreboard, ('trx', 'dims', 'bins', 'width', 'reorder', 'match')),
+    'probe': (bench_probe, ('trx',)),
+    'pipeline': (bench_pipeline, ('trx', 'dims', 'bins', 'width', 'reorder', 'match', 'batch', 'generator', 'dense')),
+}  # {case: (benchmark func, params it depends on)}
+
+DEFAULTS = {'trx': 10000, 'dims': 2, 'bins': 16, 'width': 32, 'reorder': 0, 'match': 'ordered', 'batch': 0,
+            'generator': False, 'dense': False}
+
+
+def run_case(case: str, params: dict, repeat: int = 3, seed: int = 1, trace_memory: bool = False) -> dict:
+    """Run benchmark 'repeat' times (fresh components every time). Return result record:
+        case, params, trx, seconds (best), seconds_median, trx_per_sec (best), peak_rss_kb, peak_traced_kb"""
+    func, names = CASES[case]
+    params = {name: params.get(name, DEFAULTS[name]) for name in names}
+    p = dict(DEFAULTS, **params)
+    logging.getLogger('cocotb').setLevel(logging.WARNING)  # components info logs aren't measured
+    if trace_memory:
+        tracemalloc.start()
+    times = []
+    for _ in range(repeat):
+        random.seed(seed)
+        numpy.random.seed(seed)
+        times.append(func(p))
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    best = min(times)
+    return {
+        'schema': SCHEMA_VERSION,
+        'case': case,
+        'params': params,
+        'trx': p['trx'],
+        'seconds': round(best, 6),
+        'seconds_median': round(statistics.median(times), 6),
+        'trx_per_sec': round(p['trx'] / best, 1) if best > 0 else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'peak_traced_kb': peak_traced,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+    }
+
+
+def _run_isolated(args: tuple) -> dict:
+    return run_case(*args)
+
+
+def run_suite(
+        cases: Iterable[str] = tuple(CASES),
+        sweep: Dict[str, list] = None,
+        repeat: int = 3,
+        seed: int = 1,
+        trace_memory: bool = False,
+        isolate: bool = True) -> List[dict]:
+    """Run cases for every combination of swept params values ({param: [values]}, defaults for the rest).
+        Params which case doesn't depend on aren't swept for it.
+        'isolate' - run every case in own process, so its peak RSS isn't affected by previous cases."""
+    sweep = sweep or {}
+    results = []
+    for case in cases:
+        names = CASES[case][1]
+        axes = [(name, sweep.get(name, [DEFAULTS[name]])) for name in names]
+        for values in itertools.product(*(vals for _, vals in axes)):
+            args = (case, dict(zip(names, values)), repeat, seed, trace_memory)
+            if isolate:
+                with multiprocessing.get_context().Pool(1, maxtasksperchild=1) as pool:
+                    result = pool.apply(_run_isolated, (args,))
+            else:
+                result = run_case(*args)
+            log.info(f"{case} {json.dumps(result['params'], sort_keys=True)}: {result['trx_per_sec']} trx/s, "
+                     f"peak RSS {result['peak_rss_kb']} KB")
+            results.append(result)
+    return results
+
+
+def _result_key(result: dict) -> str:
+    return result['case'] + json.dumps(result['params'], sort_keys=True)
+
+
+def check_regressions(results: List[dict], baseline: List[dict], tolerance: float = 0.2) -> List[str]:
+    """Compare results with baseline ones (same case and params).
+        Return descriptions of throughput drops and peak RSS growth by more than 'tolerance' share."""
+    reference = {_result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        ref = reference.get(_result_key(result), None)
+        if ref is None:
+            continue
+        name = f"{result['case']} {json.dumps(result['params'], sort_keys=True)}"
+        if ref['trx_per_sec'] and result['trx_per_sec'] < ref['trx_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['trx_per_sec']} trx/s vs {ref['trx_per_sec']} in baseline")
+        if ref['peak_rss_kb'] and result['peak_rss_kb'] > ref['peak_rss_kb'] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_kb']} KB vs {ref['peak_rss_kb']} in baseline")
+    return regressions
+
+
+def write_results(results: List[dict], fid):
+    """JSON line per result, sorted keys"""
+    for result in results:
+        fid.write(json.dumps(result, sort_keys=True) + '\n')
+
+
+def read_results(fname: str) -> List[dict]:
+    with open(fname) as fid:
+        return [json.loads(line) for line in fid if line.strip()]
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmark testbench components without simulator. '
+                                                 'Several values of a size param are swept.')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), help='benchmarks to run')
+    parser.add_argument('--trx', nargs='+', type=int, default=[DEFAULTS['trx']], help='number of trx')
+    parser.add_argument('--width', nargs='+', type=int, default=[DEFAULTS['width']], help='payload width (bits)')
+    parser.add_argument('--dims', nargs='+', type=int, default=[DEFAULTS['dims']],
+                        help='number of random fields (cross dimensionality)')
+    parser.add_argument('--bins', nargs='+', type=int, default=[DEFAULTS['bins']], help='bins per random field')
+    parser.add_argument('--reorder', nargs='+', type=int, default=[DEFAULTS['reorder']], help='DUT reorder depth')
+    parser.add_argument('--match', nargs='+', choices=['ordered', 'keyed'], default=[DEFAULTS['match']],
+                        help='scoreboard matching')
+    parser.add_argument('--batch', nargs='+', type=int, default=[DEFAULTS['batch']],
+                        help='monitor sample batch / coverage batch (0 - per trx)')
+    parser.add_argument('--generator', action='store_true', help='randomize by TrxGenerator')
+    parser.add_argument('--dense', action='store_true', help='dense cover cross hits')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark (best is reported)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    parser.add_argument('--trace-memory', action='store_true', help='report peak of python allocations (slower)')
+    parser.add_argument('--no-isolate', action='store_true', help="don't run every benchmark in own process")
+    parser.add_argument('-o', '--output', default=None, help='results file (JSON lines), stdout by default')
+    parser.add_argument('--baseline', default=None, help='results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed throughput drop / memory growth share')
+    args = parser.parse_args(argv)
+
+    sweep = {name: getattr(args, name) for name in ('trx', 'width', 'dims', 'bins', 'reorder', 'match', 'batch')}
+    sweep['generator'] = [args.generator]
+    sweep['dense'] = [args.dense]
+    results = run_suite(args.cases, sweep, repeat=args.repeat, seed=args.seed, trace_memory=args.trace_memory,
+                        isolate=not args.no_isolate)
+    if args.output is not None:
+        with open(args.output, 'w') as fid:
+            write_results(results, fid)
+    else:
+        write_results(results, sys.stdout)
+
+    if args.baseline is not None:
+        regressions = check_regressions(results, read_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            log.error(f'Regression: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='%(message)s')
+    sys.exit(main())
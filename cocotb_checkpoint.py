@@ -0,0 +1,80 @@
+# CocoTB. Checkpoint and resume of long runs
+
+import logging
+import os
+import os.path as osp
+import pickle
+import random
+import numpy
+
+from cocotb_util.cocotb_coverage import coverage_db, CocoTBCoverCross
+from cocotb_util.cocotb_coverage_snapshot import CoverageSnapshot
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+def save_checkpoint(fname: str, counters: dict = None, **kwargs):
+    """Store coverage hits, 'random'/'numpy' RNG states, run counters and optional picklable kwargs.
+        File is replaced atomically, so interrupted write doesn't spoil previous checkpoint."""
+    state = {
+        'coverage': CoverageSnapshot.from_db(),
+        'random': random.getstate(),
+        'numpy': numpy.random.get_state(),
+        'counters': counters or {},
+        **kwargs}
+    with open(fname + '.tmp', 'wb') as fid:
+        pickle.dump(state, fid, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(fname + '.tmp', fname)
+    log.info(f'Checkpoint stored: {fname}')
+
+
+def load_checkpoint(fname: str, restore: bool = True) -> dict:
+    """Load checkpoint. 'restore' - add checkpoint hits to coverage_db and set RNG states.
+        Run counters are returned to be restored by caller."""
+    with open(fname, 'rb') as fid:
+        state = pickle.load(fid)
+    if restore:
+        restore_coverage(state['coverage'])
+        random.setstate(state['random'])
+        numpy.random.set_state(state['numpy'])
+        log.info(f'Resumed from checkpoint: {fname}')
+    return state
+
+
+def restore_coverage(snapshot: CoverageSnapshot):
+    """Add snapshot hits to coverage_db items. Covered bins trackers and parents coverage are updated,
+        bins/threshold callbacks are not called."""
+    for name, rec in snapshot.items.items():
+        item = coverage_db.get(name, None)
+        if item is None:
+            log.warning(f'Checkpoint cover item {name} not found')
+            continue
+        # {bin name: hits key} per dimension. Point hits keys are bins, names are labels (if defined).
+        if isinstance(item, CocoTBCoverCross):
+            keys = [{repr(cp_bin): cp_bin for cp_bin in coverage_db[cp_name].detailed_coverage}
+                    for cp_name in item._items]
+        else:
+            keys = [{repr(label): bin for label, bin in zip(item.detailed_coverage, item._hits)}]
+
+        current_coverage = item.coverage
+        log_closure = getattr(item, 'log_closure', None)
+        if log_closure is not None:
+            item.log_closure = False
+        for idx in zip(*numpy.nonzero(rec['hits'])):
+            try:
+                key = tuple(keys[d][rec['tables'][d][i]] for d, i in enumerate(idx))
+            except KeyError:
+                continue  # bin isn't defined in current run
+            key = key if isinstance(item, CocoTBCoverCross) else key[0]
+            if key in item._hits:
+                item._hits[key] += int(rec['hits'][idx])
+        item._parent._update_coverage(item.coverage - current_coverage)
+        if hasattr(item, 'update_covered_bins'):
+            item.update_covered_bins()
+        if log_closure is not None:
+            item.log_closure = log_closure
+
+
+def checkpoint_exists(fname: str) -> bool:
+    return fname is not None and osp.isfile(fname)
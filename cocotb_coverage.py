@@ -3,6 +3,12 @@
 import logging
 from functools import wraps
 import importlib
+import inspect
+import itertools
+import operator
+import random
+from collections.abc import MutableMapping
+import numpy
 
 from cocotb.log import SimLog
 
@@ -10,6 +16,202 @@ cocotb_coverage = importlib.import_module('cocotb-coverage.cocotb_coverage.cover
 coverage_db = cocotb_coverage.coverage_db
 CocoTBCoverPoint = cocotb_coverage.CoverPoint
 CocoTBCoverCross = cocotb_coverage.CoverCross
+CocoTBCoverItem = cocotb_coverage.CoverItem
+
+
+class HitsTracker(dict):
+    """Bins hits dict ({bin: hits}) tracking bins coverage closure on every update.
+        Keep set of uncovered bins and list of bins covered since last 'take_closed()' call."""
+
+    def __init__(self, hits: dict, at_least: int):
+        super().__init__(hits)
+        self.at_least = at_least
+        self.uncovered = {hit for hit, cnt in hits.items() if cnt < at_least}
+        self.closed = []
+
+    def __setitem__(self, key, val):
+        dict.__setitem__(self, key, val)
+        if val >= self.at_least and key in self.uncovered:
+            self.uncovered.discard(key)
+            self.closed.append(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.uncovered.discard(key)
+
+    def pop(self, key, *default):
+        self.uncovered.discard(key)
+        return dict.pop(self, key, *default)
+
+    def take_closed(self) -> list:
+        """Get and forget bins covered since previous call"""
+        closed, self.closed = self.closed, []
+        return closed
+
+
+class DenseHits(MutableMapping):
+    """Cross bins hits stored as N-dimensional array indexed by cp bins ordinals plus mask of ignored cells.
+        Dict-like view {cross bin: hits} over it with the same closure tracking as HitsTracker has.
+        Deleted (ignored) cells are masked rather than removed. Mask of uncovered cells is updated incrementally,
+        so uncovered cell is picked without scanning all the cells (see 'pick_uncovered()')."""
+
+    _pick_probes = 32  # random cells probed before scan
+    _pick_chunk = 1 << 16  # cells scanned at once
+
+    def __init__(self, cp_bins: list, at_least: int):
+        self.cp_bins = cp_bins
+        self._ordinals = [{cp_bin: i for i, cp_bin in enumerate(bins)} for bins in cp_bins]
+        shape = tuple(len(bins) for bins in cp_bins)
+        self.hits = numpy.zeros(shape, dtype=numpy.uint32)
+        self.ignored = numpy.zeros(shape, dtype=bool)
+        self._uncovered_mask = numpy.full(shape, at_least > 0, dtype=bool)  # not ignored and not covered cells
+        self.at_least = at_least
+        self._len = self.hits.size
+        self._uncovered_cnt = self._len if at_least > 0 else 0
+        self.closed = []
+
+    def _index(self, key):
+        """Cell index of cross bin. None if no such cell."""
+        try:
+            if len(key) != len(self._ordinals):
+                return None
+            idx = tuple(ordinals[cp_bin] for ordinals, cp_bin in zip(self._ordinals, key))
+        except (KeyError, TypeError):
+            return None
+        return None if self.ignored[idx] else idx
+
+    def _key(self, idx):
+        return tuple(self.cp_bins[d][i] for d, i in enumerate(idx))
+
+    def __contains__(self, key):
+        return self._index(key) is not None
+
+    def __getitem__(self, key):
+        idx = self._index(key)
+        if idx is None:
+            raise KeyError(key)
+        return int(self.hits[idx])
+
+    def __setitem__(self, key, val):
+        idx = self._index(key)
+        if idx is None:
+            raise KeyError(key)
+        prev = self.hits[idx]
+        self.hits[idx] = val
+        if val >= self.at_least > prev:
+            self._uncovered_cnt -= 1
+            self._uncovered_mask[idx] = False
+            self.closed.append(key)
+
+    def __delitem__(self, key):
+        idx = self._index(key)
+        if idx is None:
+            raise KeyError(key)
+        self._ignore(idx)
+
+    def __iter__(self):
+        for idx in zip(*numpy.nonzero(~self.ignored)):
+            yield self._key(idx)
+
+    def __len__(self):
+        return self._len
+
+    def ignore(self, dims: list):
+        """Mask cross product of cp bins sets ('dims' - set of cp bins for every dimension)"""
+        idx = numpy.ix_(*[[self._ordinals[d][cp_bin] for cp_bin in dim] for d, dim in enumerate(dims)])
+        self._ignore(idx)
+
+    def _ignore(self, idx):
+        newly = ~self.ignored[idx]
+        self._len -= int(numpy.count_nonzero(newly))
+        self._uncovered_cnt -= int(numpy.count_nonzero(newly & (self.hits[idx] < self.at_least)))
+        self.ignored[idx] = True
+        self._uncovered_mask[idx] = False
+
+    @property
+    def uncovered(self):
+        return _DenseUncovered(self)
+
+    def pick_uncovered(self, unreachable: set = ()):
+        """Random uncovered cross bin (None if no one, unreachable ones are skipped). Random cells are probed first.
+            Then cells are scanned by chunks starting from random one till uncovered one is found."""
+        if not self._uncovered_cnt:
+            return None
+        flat = self._uncovered_mask.reshape(-1)
+        n = flat.size
+        for _ in range(self._pick_probes):
+            pos = random.randrange(n)
+            if flat[pos]:
+                key = self._key(numpy.unravel_index(pos, self.hits.shape))
+                if key not in unreachable:
+                    return key
+        start = random.randrange(n)
+        for lo, end in itertools.chain(((lo, n) for lo in range(start, n, self._pick_chunk)),
+                                       ((lo, start) for lo in range(0, start, self._pick_chunk))):
+            found = numpy.flatnonzero(flat[lo:min(lo + self._pick_chunk, end)])
+            offset = random.randrange(len(found)) if len(found) else 0
+            for pos in itertools.chain(found[offset:], found[:offset]):
+                key = self._key(numpy.unravel_index(lo + pos, self.hits.shape))
+                if key not in unreachable:
+                    return key
+        return None
+
+    def take_closed(self) -> list:
+        """Get and forget bins covered since previous call"""
+        closed, self.closed = self.closed, []
+        return closed
+
+
+class _DenseUncovered(object):
+    """Uncovered cross bins view over DenseHits"""
+
+    def __init__(self, hits: DenseHits):
+        self._dense = hits
+
+    def __len__(self):
+        return self._dense._uncovered_cnt
+
+    def __contains__(self, key):
+        return key in self._dense and self._dense[key] < self._dense.at_least
+
+    def __iter__(self):
+        dense = self._dense
+        for idx in zip(*numpy.nonzero(dense._uncovered_mask)):
+            yield dense._key(idx)
+
+
+def _pick(bins, window: int, unreachable: set = ()):
+    """Random item among first 'window' ones of the set skipping unreachable ones. None if no one."""
+    candidates = list(itertools.islice((bin for bin in bins if bin not in unreachable), window))
+    return random.choice(candidates) if candidates else None
+
+
+def _reachable_percentage(item) -> float:
+    """Coverage (%) of cover item discounting uncovered bins marked unreachable"""
+    uncovered = item._hits.uncovered
+    size = item._size - item._weight * sum(1 for bin in item._unreachable if bin in uncovered)
+    return 100 * item.coverage / size if size else 100.0
+
+
+def _update_hits(item, hits: dict):
+    """Add number of hits to bins of cover item (batch sampling) and do the same bookkeeping as single sample does:
+    coverage update, bins and threshold callbacks, covered bins update"""
+    current_coverage = item.coverage
+    for hit, cnt in hits.items():
+        item._hits[hit] += cnt
+        if hit in item._bins_callbacks:
+            for _ in range(cnt):
+                item._bins_callbacks[hit]()
+    if getattr(item, '_bins_labels', None) is not None:
+        item._new_hits = [item._labels_bins[hit] for hit in hits]
+    else:
+        item._new_hits = list(hits)
+    item._parent._update_coverage(item.coverage - current_coverage)
+    for ii in item._threshold_callbacks:
+        if ii > 100 * current_coverage / item.size and ii <= 100 * item.coverage / item.size:
+            item._threshold_callbacks[ii]()
+    item.update_covered_bins()
+
 
 class CoverPoint(CocoTBCoverPoint):
     def __new__(cls, name, *args, **kwargs):
@@ -18,34 +220,200 @@ class CoverPoint(CocoTBCoverPoint):
         else:
             return super().__new__(cls, name)
 
-    def __init__(self, name, *args, inj=False, **kwargs):
+    def __init__(self, name, *args, inj=False, field=None, vxf=None, ranges=None, buckets=None, **kwargs):
+        """'field' - trx field to be sampled by 'sample_batch()' (column name).
+        'vxf' - vectorized transformation func used by 'sample_batch()': {field: array} -> array of values.
+        'ranges' - interval bins [(lo, hi), ...] (inclusive, non-overlapping) instead of 'bins'.
+        'buckets' - (lo, hi, n): n equal interval bins over [lo, hi] instead of 'bins'.
+        Interval bins keys are (lo, hi) tuples. Sampled value is matched to interval by bisection of sorted boundaries."""
         if name not in coverage_db:
+            if buckets is not None:
+                ranges = self.split_buckets(*buckets)
+            self._range_lo = None
+            if ranges is not None:
+                ranges = [tuple(r) for r in ranges]
+                if kwargs.get('bins_labels', None) is not None:
+                    ranges, kwargs['bins_labels'] = map(list, zip(*sorted(zip(ranges, kwargs['bins_labels']))))
+                else:
+                    ranges = sorted(ranges)
+                kwargs['bins'] = ranges
+                kwargs['rel'] = lambda val, bin: bin[0] <= val <= bin[1]
+                self._range_lo = numpy.array([r[0] for r in ranges])
+                self._range_hi = numpy.array([r[1] for r in ranges])
+                assert numpy.all(self._range_lo[1:] > self._range_hi[:-1]), f"Overlapped ranges of {name}"
             super().__init__(name, *args, inj=inj, **kwargs)
+            self._field = field
+            self._vxf = vxf
+            self._batch_bins = None  # bins lookup data to be prepared at first 'sample_batch()' call
+            self._unreachable = set()  # bins trx can't be directed to (see 'mark_unreachable()')
             if getattr(self, 'log', None) is None:
                 self.log = SimLog(f"cocotb.{name}")
                 self.log.setLevel(logging.INFO)
 
             self.log.debug(f'Create CoverPoint: {name}')
             self._covered_bins = {}  # to fill with covered bins
+            self._hits = HitsTracker(self._hits, self._at_least)
+
+    @staticmethod
+    def split_buckets(lo: int, hi: int, n: int) -> list:
+        """Split [lo, hi] integer range to n (or less if range is short) equal intervals"""
+        edges = sorted(set(lo + (hi - lo + 1) * k // n for k in range(n + 1)))
+        return [(edges[k], edges[k + 1] - 1) for k in range(len(edges) - 1)]
 
     def __call__(self, f):
         """Collect coverage decorator. Call super func + custom func"""
+        self._init_transformation(f)
+        if self._range_lo is not None:
+            return self._range_call(f)
         super_call = super().__call__(f)
 
         @wraps(f)
         def _wrapped_function(*cb_args, **cb_kwargs):
-            self.log.debug(f'Collect coverage for {self._name}')
+            self.log.debug('Collect coverage for %s', self._name)
             foo = super_call(*cb_args, **cb_kwargs)
             self.update_covered_bins()
             return foo
         return _wrapped_function
 
+    def _init_transformation(self, f):
+        """Set sampled value func when decorating rather than at first sample (as super().__call__() does),
+            so 'sample_batch()' may use it before any single sample: 'vname' arg or single arg (args tuple) of func"""
+        if self._transformation is None:
+            if self._vname is not None:
+                idx = list(inspect.signature(f).parameters).index(self._vname)
+                self._transformation = lambda *cb_args: cb_args[idx]
+            else:
+                self._transformation = lambda *cb_args: cb_args[0] if len(cb_args) == 1 else cb_args
+
+    def _range_call(self, f):
+        """Collect coverage decorator for interval bins. Matched bin is found by bisection rather than by all bins scan.
+            Sampled value is 'xf(*args)', 'vname' arg or single arg of decorated func."""
+        bins = list(self._hits)
+        value_fn = self._transformation
+
+        @wraps(f)
+        def _wrapped_function(*cb_args, **cb_kwargs):
+            self.log.debug('Collect coverage for %s', self._name)
+            i = self._range_index(value_fn(*cb_args))
+            _update_hits(self, {bins[i]: 1} if i >= 0 else {})
+            return f(*cb_args, **cb_kwargs)
+        return _wrapped_function
+
+    def _range_index(self, values):
+        """Interval bin ordinal (-1 if no one) for value or array of values"""
+        i = numpy.searchsorted(self._range_lo, values, side='right') - 1
+        i_valid = numpy.maximum(i, 0)
+        return numpy.where((i >= 0) & (values <= self._range_hi[i_valid]), i, -1)
+
     def update_covered_bins(self):
         """Update list of covered bins"""
-        for hit in self.new_hits:
-            if self.detailed_coverage[hit] == self._at_least:
-                self._covered_bins[hit] = 0
-                self.log.debug(f"Covered bins: {self._covered_bins}")
+        for hit in self._hits.take_closed():
+            if self._bins_labels is not None:
+                hit = self._labels_bins[hit]
+            self._covered_bins[hit] = 0
+            self.log.debug("Covered bin: %s", hit)
+
+    def sample_batch(self, columns: dict = None, trxs: list = None):
+        """Sample many values at once. Values are taken from 'columns' ('field' or 'vxf') or calculated by 'xf' for every trx.
+            Return matched bin ordinal per sample (-1 if no one): int array if bins are matched by equality,
+            list of ordinals lists for custom relation func."""
+        if self._field is not None:
+            values = columns[self._field]
+        elif self._vxf is not None:
+            values = self._vxf(columns)
+        else:
+            assert self._transformation is not None and trxs is not None, \
+                f"Either 'field', 'vxf' or 'xf' with trx list required to sample {self._name} batch"
+            values = [self._transformation(trx) for trx in trxs]
+
+        bins = list(self._hits)
+        if self._range_lo is not None or self._relation is operator.eq:
+            if self._range_lo is not None:
+                bin_idx = self._range_index(numpy.asarray(values))
+            else:
+                bin_idx = self._bin_index(values)
+            counts = numpy.bincount(bin_idx[bin_idx >= 0], minlength=len(bins))
+            hits = {bins[i]: int(counts[i]) for i in numpy.flatnonzero(counts)}
+        else:
+            bin_idx = []
+            hits = {}
+            for value in values:
+                matched = []
+                for i, bin in enumerate(bins):
+                    if self._relation(value, bin):
+                        matched.append(i)
+                        hits[bin] = hits.get(bin, 0) + 1
+                        if self._injection:
+                            break
+                bin_idx.append(matched)
+        _update_hits(self, hits)
+        return bin_idx
+
+    def _bin_index(self, values):
+        """Bin ordinal (-1 if no one) for every value. Sorted bins search for numbers, dict lookup otherwise."""
+        if self._batch_bins is None:
+            bins = list(self._hits)
+            lookup = {bin: i for i, bin in enumerate(bins)}
+            bins_arr = numpy.asarray(bins) if bins else numpy.zeros(0)
+            if bins_arr.ndim == 1 and bins_arr.dtype.kind in 'biuf' and len(bins_arr):
+                order = numpy.argsort(bins_arr, kind='stable')
+                self._batch_bins = (lookup, bins_arr[order], order)
+            else:
+                self._batch_bins = (lookup, None, None)
+        lookup, bins_sorted, order = self._batch_bins
+        if bins_sorted is not None:
+            values_arr = numpy.asarray(values)
+            if values_arr.ndim == 1 and values_arr.dtype.kind in 'biuf':
+                pos = numpy.minimum(numpy.searchsorted(bins_sorted, values_arr), len(bins_sorted) - 1)
+                return numpy.where(bins_sorted[pos] == values_arr, order[pos], -1)
+        return numpy.fromiter((lookup.get(v, -1) for v in values), dtype=numpy.int64)
+
+    @property
+    def coverage(self):
+        """Size of covered bins. Calculated using tracked uncovered bins number rather than by walking all the bins."""
+        return self._size - self._weight * len(self._hits.uncovered)
+
+    @property
+    def uncovered_bins(self) -> set:
+        """Bins (labels if defined) which are not covered yet"""
+        if self._bins_labels is not None:
+            return {self._labels_bins[hit] for hit in self._hits.uncovered}
+        return self._hits.uncovered
+
+    @property
+    def directable(self) -> bool:
+        """Whether trx field sampled by cover point is known (see 'field'), so trx may be directed to uncovered bins"""
+        return self._field is not None
+
+    def pick_uncovered(self, window: int = 64):
+        """Random uncovered bin (not label) among first 'window' reachable ones. None if all covered or unreachable."""
+        return _pick(self._hits.uncovered, window, self._unreachable)
+
+    def mark_unreachable(self, bin):
+        """Don't pick bin (not label) any more: trx can't be directed to it"""
+        self._unreachable.add(bin)
+
+    @property
+    def reachable_percentage(self) -> float:
+        """Coverage (%) of bins not marked unreachable"""
+        return _reachable_percentage(self)
+
+    def bin_target(self, bin) -> dict:
+        """How to hit bin (not label): {field: (predicate(value), value generator or None)}"""
+        if self._range_lo is not None:
+            lo, hi = bin
+            return {self._field: (lambda v: lo <= v <= hi, lambda: random.randint(lo, hi))}
+        if self._relation is operator.eq:
+            return {self._field: (lambda v: v == bin, lambda: bin)}
+        return {self._field: (lambda v: self._relation(v, bin), None)}
+
+    def key_bin(self, key):
+        """Bin by bin key (label if defined)"""
+        if self._bins_labels is None:
+            return key
+        if getattr(self, '_keys_bins', None) is None:
+            self._keys_bins = {label: bin for bin, label in self._labels_bins.items()}
+        return self._keys_bins[key]
 
     @property
     def covered_bins(self):
@@ -70,13 +438,25 @@ class CoverCross(CocoTBCoverCross):
         else:
             return super().__new__(cls, name)
 
-    def __init__(self, name, *args, **kwargs):
+    def __init__(self, name, items=[], ign_bins=[], weight=1, at_least=1, log_closure=True, dense=False):
+        """'dense' - store cross bins hits as N-dimensional array (see DenseHits) rather than dict of all the cross bins"""
         if name not in coverage_db:
-            super().__init__(name, *args, **kwargs)
+            if dense:
+                self._init_dense(name, items, weight, at_least)
+            else:
+                # 'ignore bins' are removed below rather than in super().__init__() which matches every cross bin to every ignore bin
+                super().__init__(name, items, [], weight, at_least)
+                self._hits = HitsTracker(self._hits, self._at_least)
             if getattr(self, 'log', None) is None:
                 self.log = SimLog(f"cocotb.{name}")
                 self.log.setLevel(logging.INFO)
             self.log.debug(f'Create CoverCross: {name}')
+            self._unreachable = set()  # cross bins trx can't be directed to (see 'mark_unreachable()')
+
+            # remove 'ignore bins' from _hits. Ignore bin components are defined by cp bins, list of cp bins or None (wildcard *)
+            len_hits_former = len(self._hits)
+            self._remove_ign_bins(ign_bins)
+            self.log_closure = log_closure  # log cp bin when all its cross bins covered
 
             # Initialize data to update 'covered cp bins' for every ccp dimension
             self._covered_bins = {}
@@ -85,32 +465,22 @@ class CoverCross(CocoTBCoverCross):
                 self._covered_bins[cp_name] = {}  # to fill with covered bins
                 self._bin_cnt[cp_name] = {}  # for every cp prepare dict with {cp_bin: num_child_ccp_bins}
             # for every cp bin calc num of descendant ccp bins
-            for ccp_bin in self.detailed_coverage:
-                for i, cp_bin in enumerate(ccp_bin):
-                    cp_name = self._items[i]
-                    try:
-                        self._bin_cnt[cp_name][cp_bin] += 1
-                    except KeyError:
-                        self._bin_cnt[cp_name][cp_bin] = 1
-
-            # remove rest of 'ignore bins' from _hits which components are defined by list of cv bins.
-            # 'ignore bins' which components were defined by cp bins or None (wildcard *) were already removed in super().__init__()
-            ign_bins = kwargs.get('ign_bins', [])
-            len_hits_former = len(self._hits)
-            for x_bin in list(self._hits.keys()):
-                for ignore_bins in ign_bins:
-                    assert len(ignore_bins) == len(x_bin), f"Length({len(ignore_bins)}) of ignore bin({ignore_bins}) doesn't match to length({len(x_bin)}) of cross one{x_bin}"
-                    remove = True
-                    for ii in range(0, len(x_bin)):
-                        if isinstance(ignore_bins[ii], (list, tuple)):
-                            if (x_bin[ii] not in ignore_bins[ii]):
-                                remove = False
-                        else:
-                            if (x_bin[ii] != ignore_bins[ii]):
-                                remove = False
-                    if remove and (x_bin in self._hits):
-                        del self._hits[x_bin]
-                        self.log.debug(f"Remove ignore bin: {x_bin}")
+            if isinstance(self._hits, DenseHits):
+                valid = ~self._hits.ignored
+                for i, cp_name in enumerate(self._items):
+                    cnt = valid.sum(axis=tuple(d for d in range(valid.ndim) if d != i))
+                    for cp_bin, n in zip(self._hits.cp_bins[i], cnt.tolist()):
+                        if n > 0:
+                            self._bin_cnt[cp_name][cp_bin] = n
+            else:
+                for ccp_bin in self.detailed_coverage:
+                    for i, cp_bin in enumerate(ccp_bin):
+                        cp_name = self._items[i]
+                        try:
+                            self._bin_cnt[cp_name][cp_bin] += 1
+                        except KeyError:
+                            self._bin_cnt[cp_name][cp_bin] = 1
+
             # compensate former size update
             self._parent._update_size(-self._weight * len_hits_former)
             self.log.debug(f"Compensate former size: {-self._weight * len_hits_former}")
@@ -119,12 +489,56 @@ class CoverCross(CocoTBCoverCross):
             self._parent._update_size(self._size)
             self.log.debug(f"Update latter size: {self._size}")
 
+    def _init_dense(self, name, items, weight, at_least):
+        """Init cross with dense hits storage instead of super().__init__() which creates dict of all the cross bins"""
+        CocoTBCoverItem.__init__(self, name)
+        if self._parent is None:
+            raise Exception("CoverCross must have a parent (parent.CoverCross)")
+        self._weight = weight
+        self._at_least = at_least
+        self._items = items
+        self._hits = DenseHits([list(coverage_db[cp_name].detailed_coverage) for cp_name in items], at_least)
+        self._size = self._weight * len(self._hits)
+        self._parent._update_size(self._size)
+
+    def _remove_ign_bins(self, ign_bins):
+        """Remove 'ignore bins' from _hits.
+            Every ignore bin is expanded to per-dimension sets of matching cp bins and only their cross product
+            is removed, instead of matching every cross bin against every ignore bin. Component is matched to cp bins:
+            None - any, cp bin itself (e.g. tuple bin of interval CoverPoint), otherwise list/tuple - any of listed."""
+        cp_bins = [coverage_db[cp_name].detailed_coverage.keys() for cp_name in self._items]
+        for ignore_bins in ign_bins:
+            assert len(ignore_bins) == len(cp_bins), f"Length({len(ignore_bins)}) of ignore bin({ignore_bins}) doesn't match to length({len(cp_bins)}) of cross one"
+            dims = []
+            for ii, ignore_bin in enumerate(ignore_bins):
+                if ignore_bin is None:
+                    dims.append(cp_bins[ii])
+                elif self._is_cp_bin(ignore_bin, cp_bins[ii]):
+                    dims.append((ignore_bin,))
+                elif isinstance(ignore_bin, (list, tuple)):
+                    dims.append({cp_bin for cp_bin in ignore_bin if self._is_cp_bin(cp_bin, cp_bins[ii])})
+                else:
+                    dims.append(())
+            if isinstance(self._hits, DenseHits):
+                self._hits.ignore(dims)
+                continue
+            for x_bin in itertools.product(*dims):
+                if self._hits.pop(x_bin, None) is not None:
+                    self.log.debug("Remove ignore bin: %s", x_bin)
+
+    @staticmethod
+    def _is_cp_bin(bin, cp_bins) -> bool:
+        try:
+            return bin in cp_bins
+        except TypeError:  # unhashable
+            return False
+
     def __call__(self, f):
         super_call = super().__call__(f)
 
         @wraps(f)
         def _wrapped_function(*cb_args, **cb_kwargs):
-            self.log.debug(f'Collect coverage for {self._name}')
+            self.log.debug('Collect coverage for %s', self._name)
             foo = super_call(*cb_args, **cb_kwargs)
             self.update_covered_bins()
             return foo
@@ -133,16 +547,95 @@ class CoverCross(CocoTBCoverCross):
     def update_covered_bins(self):
         """Update list of covered cp bins for every ccp dimension"""
         # Update 'covered bins' for every ccp dimension
-        for hit in self.new_hits:
-            if self.detailed_coverage[hit] == self._at_least:
-                for i, cp_bin in enumerate(hit):
-                    cp_name = self._items[i]
-                    self._bin_cnt[cp_name][cp_bin] -= 1
-                    if self._bin_cnt[cp_name][cp_bin] == 0:
-                        self._covered_bins[cp_name][cp_bin] = 0
-                        self.log.info('')
-                        self.log.info(f"Covered bins: {cp_name}: {self._covered_bins[cp_name].keys()}")
-                        self.log.info('')
+        for hit in self._hits.take_closed():
+            for i, cp_bin in enumerate(hit):
+                cp_name = self._items[i]
+                self._bin_cnt[cp_name][cp_bin] -= 1
+                if self._bin_cnt[cp_name][cp_bin] == 0:
+                    self._covered_bins[cp_name][cp_bin] = 0
+                    if self.log_closure:
+                        self.log.info(f"Covered bin: {cp_name}: {cp_bin} "
+                                      f"({len(self._covered_bins[cp_name])}/{len(self._bin_cnt[cp_name])})")
+
+    def sample_batch(self, bin_idx: dict, n: int = None):
+        """Sample many values at once using bin ordinals matched by cover points ({cp_name: CoverPoint.sample_batch() result}).
+            Cover point sampled elsewhere (not in 'bin_idx') contributes its latest hits to each of 'n' samples,
+            as single sample does. Cross bins hits are counted by unique flattened ordinals tuples."""
+        cp_bins = [list(coverage_db[cp_name].detailed_coverage) for cp_name in self._items]
+        if n is None:
+            n = next(len(bin_idx[cp_name]) for cp_name in self._items if cp_name in bin_idx)
+        dims = [bin_idx[cp_name] if cp_name in bin_idx else self._latest_hits_idx(cp_name, cp_bins[d], n)
+                for d, cp_name in enumerate(self._items)]
+        hits = {}
+        if all(isinstance(dim, numpy.ndarray) for dim in dims):
+            dims = numpy.stack(dims)
+            dims = dims[:, numpy.all(dims >= 0, axis=0)]
+            shape = tuple(len(bins) for bins in cp_bins)
+            flat, counts = numpy.unique(numpy.ravel_multi_index(dims, shape), return_counts=True)
+            for x_idx, cnt in zip(zip(*numpy.unravel_index(flat, shape)), counts):
+                x_bin = tuple(cp_bins[d][i] for d, i in enumerate(x_idx))
+                if x_bin in self._hits:
+                    hits[x_bin] = int(cnt)
+        else:
+            dims = [[[i] if i >= 0 else [] for i in dim] if isinstance(dim, numpy.ndarray) else dim for dim in dims]
+            for sample in zip(*dims):
+                for x_idx in itertools.product(*sample):
+                    x_bin = tuple(cp_bins[d][i] for d, i in enumerate(x_idx))
+                    if x_bin in self._hits:
+                        hits[x_bin] = hits.get(x_bin, 0) + 1
+        _update_hits(self, hits)
+
+    @staticmethod
+    def _latest_hits_idx(cp_name, cp_bins: list, n: int):
+        """Bin ordinals of cover point latest hits repeated for n samples (int array if single or no hit)"""
+        hits = [cp_bins.index(hit) for hit in getattr(coverage_db[cp_name], '_new_hits', [])]
+        if len(hits) <= 1:
+            return numpy.full(n, hits[0] if hits else -1, dtype=numpy.int64)
+        return [hits] * n
+
+    @property
+    def coverage(self):
+        """Size of covered bins. Calculated using tracked uncovered bins number rather than by walking all the bins."""
+        return self._size - self._weight * len(self._hits.uncovered)
+
+    @property
+    def uncovered_bins(self) -> set:
+        """Cross bins which are not covered yet"""
+        return self._hits.uncovered
+
+    def closure(self, cp_name: str) -> tuple:
+        """Number of covered and total number of cp bins of cross dimension"""
+        return len(self._covered_bins[cp_name]), len(self._bin_cnt[cp_name])
+
+    @property
+    def directable(self) -> bool:
+        """Whether trx field is known for some cross dimension, so trx may be directed to uncovered bins"""
+        return any(getattr(coverage_db[cp_name], 'directable', False) for cp_name in self._items)
+
+    def pick_uncovered(self, window: int = 64):
+        """Random uncovered cross bin among first 'window' reachable ones (any reachable one for dense hits).
+            None if all covered or unreachable."""
+        if isinstance(self._hits, DenseHits):
+            return self._hits.pick_uncovered(self._unreachable)
+        return _pick(self._hits.uncovered, window, self._unreachable)
+
+    def mark_unreachable(self, x_bin):
+        """Don't pick cross bin any more: trx can't be directed to it"""
+        self._unreachable.add(x_bin)
+
+    @property
+    def reachable_percentage(self) -> float:
+        """Coverage (%) of cross bins not marked unreachable"""
+        return _reachable_percentage(self)
+
+    def bin_target(self, x_bin) -> dict:
+        """How to hit cross bin: {field: (predicate(value), value generator or None)} for every directable dimension"""
+        target = {}
+        for cp_name, key in zip(self._items, x_bin):
+            cp = coverage_db[cp_name]
+            if getattr(cp, 'directable', False):
+                target.update(cp.bin_target(cp.key_bin(key)))
+        return target
 
     @property
     def covered_bins(self):
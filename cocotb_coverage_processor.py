@@ -3,18 +3,57 @@
 import importlib
 
 import logging
+import os
+import time
+from functools import wraps
 from typing import Callable
+import numpy
 
 from cocotb.log import SimLog
+from cocotb.utils import get_sim_time
 
 cocotb_coverage = importlib.import_module('cocotb-coverage.cocotb_coverage.coverage')
 coverage_db = cocotb_coverage.coverage_db
 coverage_section = cocotb_coverage.coverage_section
 
 from cocotb_util.cocotb_transaction import Transaction
-# from cocotb_util.cocotb_coverage import CoverPoint, CoverCross
+from cocotb_util.cocotb_coverage import CoverCross
+from cocotb_util.cocotb_coverage_snapshot import SnapshotWriter
 
 from cocotb_util.cocotb_util import timeout
+from cocotb_util.cocotb_profiler import profiler
+
+
+class RateLimit(object):
+    """Rate of periodic action: every 'trx' transactions and/or 'seconds' of wall time and/or 'sim_ns' of simulation
+        time (every trx if no one is given)"""
+
+    def __init__(self, trx: int = None, seconds: float = None, sim_ns: float = None):
+        self.trx = trx
+        self.seconds = seconds
+        self.sim_ns = sim_ns
+        self.every_trx = trx is None and seconds is None and sim_ns is None
+        self._next_time = time.monotonic() + seconds if seconds is not None else None
+        self._next_sim_ns = sim_ns
+
+    def due(self, trx_cnt: int, n: int = 1) -> bool:
+        """Check whether action is due ('trx_cnt' - number of trx so far, 'n' - number of trx since previous check)"""
+        if self.every_trx:
+            return True
+        due = False
+        if self.trx is not None and trx_cnt // self.trx != (trx_cnt - n) // self.trx:
+            due = True
+        if self._next_time is not None:
+            now = time.monotonic()
+            if now >= self._next_time:
+                self._next_time = now + self.seconds
+                due = True
+        if self._next_sim_ns is not None:
+            now = get_sim_time(units='ns')
+            if now >= self._next_sim_ns:
+                self._next_sim_ns = now + self.sim_ns
+                due = True
+        return due
 
 
 class CoverProcessor(object):
@@ -23,16 +62,31 @@ class CoverProcessor(object):
             self,
             name: str = "cocotb.coverage",
             trx: Transaction = None,
-            report_cfg: dict = {'status': {}, 'final': {'bins': True}},
+            report_cfg: dict = {'status': {'trx': 100}, 'final': {'bins': True}},
             **kwargs):
+        """'report_cfg['status']' - status report rate: every 'trx' transactions and/or 'seconds' of wall time
+        and/or 'sim_ns' of simulation time (report at every trx if empty).
+        'report_cfg['final']' - final report args.
+        'report_cfg['snapshot']' - optional SnapshotWriter args (e.g. {'fname_base': 'coverage', 'delta': True}):
+        coverage snapshot is stored at every status report and at final report.
+        'report_cfg['checkpoint']' - checkpoint rate ('trx', 'seconds' and/or 'sim_ns' as for status report,
+        every 10 minutes of wall time by default). See 'checkpoint_fn'."""
 
         self.log = SimLog(name)
         self.log.setLevel(logging.INFO)
 
+        self.report_cfg = report_cfg
+        self._status_rate = RateLimit(**report_cfg.get('status', {}))
+        self._checkpoint_rate = RateLimit(**report_cfg.get('checkpoint', {'seconds': 600}))
+        self._trx_cnt = 0
+        snapshot_cfg = report_cfg.get('snapshot', None)
+        self.snapshot_writer = SnapshotWriter(**snapshot_cfg) if snapshot_cfg is not None else None
+
         # list of callbacks to be called after CoverPoints calls at every sample
         self.callbacks = []
         self.status_report_callback = None
         self.final_report_callback = None
+        self.checkpoint_fn = None  # called at 'checkpoint' rate and at timeout (see TestBench.checkpoint())
 
         self.trx = trx  # Transaction class handle
 
@@ -56,7 +110,8 @@ class CoverProcessor(object):
 
     def _callback_dec(self, func):
         """ 'Coverage post process' decorator. Call list of registered callbacks after all the CoverItems sampled.
-        """
+        Keeps 'func' signature, so cover items 'vname' is matched to its args."""
+        @wraps(func)
         def inner(*args, **kwargs):
             for callback_func in self.callbacks:
                 callback_func(*args, **kwargs)
@@ -64,39 +119,104 @@ class CoverProcessor(object):
         return inner
 
     def add_cover_items(self, *args):
-        """Schedule Cover items (Point & Cross) and 'callback' calls"""
+        """Schedule Cover items (Point & Cross) and 'callback' calls. Build sampling func once."""
         self._coverage_section = coverage_section(*args, self._callback_dec)
+        self._cover_items = args
+
+        @self._coverage_section
+        def sample(trx):
+            pass
+
+        self._sample = sample
 
     def define(self):
         """Create coverage collector decorator using self.add_cover_items(CoverPoint, CoverCross, ...). To be overridden."""
         self.log.error('Not implemented')
 
+    @profiler.measure('coverage')
     @timeout
     def collect(
             self,
             trx: Transaction):
         """Function to collect coverage. It makes sense to call it somewhere."""
         assert isinstance(trx, Transaction)
+        self._sample(trx)
+        self._trx_cnt += 1
+        self._periodic_reports()
 
-        @self._coverage_section
-        def foo(trx):
-            self.log.debug('Collect coverage')
-            pass
-
-        foo(trx)
-        self.status_report()
-
+    @profiler.measure('coverage')
+    @timeout
+    def collect_batch(
+            self,
+            trxs: list = None,
+            columns: dict = None):
+        """Collect coverage for many trx at once: trx list and/or columns of trx fields ({field: array}).
+            Every CoverPoint bins the batch with vectorized ops ('field'/'vxf' from columns or 'xf' per trx)
+            and updates its hits once. Per trx callbacks are called for every trx (trx list required).
+            Falls back to per trx sampling if some cover item doesn't support batch sampling."""
+        assert trxs is not None or columns is not None
+        if columns is None:
+            columns = {item: numpy.asarray([getattr(trx, item) for trx in trxs]) for item in trxs[0]._items} if trxs else {}
+        n = len(trxs) if trxs is not None else len(next(iter(columns.values())))
+
+        if not all(hasattr(item, 'sample_batch') for item in self._cover_items):
+            assert trxs is not None, "Cover items don't support batch sampling. Trx list required."
+            for trx in trxs:
+                self._sample(trx)
+        else:
+            # sample CoverPoints first. CoverCross uses bins matched by them.
+            bin_idx = {}
+            for item in self._cover_items:
+                if not isinstance(item, CoverCross):
+                    bin_idx[item._name] = item.sample_batch(columns, trxs)
+            for item in self._cover_items:
+                if isinstance(item, CoverCross):
+                    item.sample_batch(bin_idx, n)
+            if self.callbacks:
+                assert trxs is not None, "Per trx callbacks require trx list"
+                for trx in trxs:
+                    for callback_func in self.callbacks:
+                        callback_func(trx)
+
+        self._trx_cnt += n
+        self._periodic_reports(n)
+
+    def _periodic_reports(self, n: int = 1):
+        """Report status and store checkpoint when due ('n' - number of trx sampled since previous check)"""
+        if self._status_rate.due(self._trx_cnt, n):
+            self.status_report()
+        if self.checkpoint_fn is not None and self._checkpoint_rate.due(self._trx_cnt, n):
+            self.checkpoint_fn()
+
+    @profiler.measure('report')
     def status_report(self):
         """Function to report intermediate coverage status during the test."""
         if self.status_report_callback is not None:
             self.status_report_callback()
         else:
             coverage_db.report_coverage(self.log.info, bins=False)
+        profiler.status(self.log.info)
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.write()
 
+    @profiler.measure('report')
     def final_report(self):
         """Function to report final coverage result at the end of the test"""
         self.log.info('Coverage final results')
         if self.final_report_callback is not None:
             self.final_report_callback()
         else:
-            coverage_db.report_coverage(self.log.info, bins=True)
+            coverage_db.report_coverage(self.log.info, **self.report_cfg.get('final', {'bins': True}))
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.write()
+        self.export()
+
+    def export(self, fname: str = None):
+        """Export coverage to xml/yml file ('COCOTB_COVERAGE_FILE' env var by default, e.g. set by regression runner)"""
+        fname = os.environ.get('COCOTB_COVERAGE_FILE', None) if fname is None else fname
+        if fname is None:
+            return
+        if fname.endswith(('.yml', '.yaml')):
+            coverage_db.export_to_yaml(fname)
+        else:
+            coverage_db.export_to_xml(fname)
@@ -0,0 +1,255 @@
+# CocoTB. Coverage snapshots
+
+import argparse
+import ast
+import json
+import logging
+import sys
+from typing import Iterable
+import numpy
+
+from cocotb_util.cocotb_coverage import coverage_db, CocoTBCoverPoint, CocoTBCoverCross, DenseHits
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+def _bin_key(name: str):
+    """Bin key from its name (repr). Name itself if it's not a literal."""
+    try:
+        return ast.literal_eval(name)
+    except (ValueError, SyntaxError):
+        return name
+
+
+class CoverageSnapshot(object):
+    """Compact coverage snapshot: hits array and bin names table(s) per cover item.
+        Cover point - 1-d hits array over its bins (labels if defined).
+        Cover cross - N-d hits array over cp bins (one names table per dimension) and mask of valid (not ignored) cells.
+        Bin names are bin reprs.
+        Stored as numpy '.npz' archive. Items are read lazily, so snapshots are merged item by item
+        (see merge_snapshots()). Delta snapshot has the same format: merge of deltas sums them up."""
+
+    def __init__(self):
+        self.items = {}  # {name: {'meta': dict, 'tables': [names array per dim], 'hits': array, 'valid': array}}
+
+    @classmethod
+    def from_db(cls, names: Iterable[str] = None):
+        """Snapshot of coverage_db cover points and crosses"""
+        snapshot = cls()
+        names = coverage_db if names is None else names
+        for name in names:
+            item = coverage_db[name]
+            if isinstance(item, CocoTBCoverCross):
+                snapshot.items[name] = cls._cross_record(item)
+            elif isinstance(item, CocoTBCoverPoint):
+                bins = list(item.detailed_coverage)  # labels if defined
+                snapshot.items[name] = {
+                    'meta': {'type': 'point', 'at_least': item._at_least, 'weight': item._weight},
+                    'tables': [numpy.array([repr(bin) for bin in bins], dtype=str)],
+                    'hits': numpy.fromiter(item._hits.values(), dtype=numpy.int64, count=len(bins)),
+                    'valid': numpy.ones(len(bins), dtype=bool)}
+        return snapshot
+
+    @staticmethod
+    def _cross_record(item) -> dict:
+        if isinstance(item._hits, DenseHits):
+            cp_bins = item._hits.cp_bins
+            hits = item._hits.hits.astype(numpy.int64)
+            valid = ~item._hits.ignored
+        else:
+            cp_bins = [list(coverage_db[cp_name].detailed_coverage) for cp_name in item._items]
+            ordinals = [{cp_bin: i for i, cp_bin in enumerate(bins)} for bins in cp_bins]
+            hits = numpy.zeros(tuple(len(bins) for bins in cp_bins), dtype=numpy.int64)
+            valid = numpy.zeros(hits.shape, dtype=bool)
+            for x_bin, cnt in item._hits.items():
+                idx = tuple(ordinals[d][cp_bin] for d, cp_bin in enumerate(x_bin))
+                hits[idx] = cnt
+                valid[idx] = True
+        return {
+            'meta': {'type': 'cross', 'at_least': item._at_least, 'weight': item._weight, 'items': list(item._items)},
+            'tables': [numpy.array([repr(cp_bin) for cp_bin in bins], dtype=str) for bins in cp_bins],
+            'hits': hits,
+            'valid': valid}
+
+    def save(self, fname: str):
+        """Store snapshot to '.npz' file"""
+        arrays = {}
+        meta = {}
+        for n, (name, rec) in enumerate(self.items.items()):
+            meta[name] = dict(rec['meta'], key=n, ndim=len(rec['tables']))
+            arrays[f'{n}.hits'] = rec['hits']
+            arrays[f'{n}.valid'] = rec['valid']
+            for d, table in enumerate(rec['tables']):
+                arrays[f'{n}.dim{d}'] = table
+        numpy.savez(fname, __meta__=numpy.array(json.dumps(meta)), **arrays)
+
+    @staticmethod
+    def iter_file(fname: str):
+        """Read snapshot file item by item: (name, record) generator"""
+        with numpy.load(fname) as npz:
+            for name, meta in json.loads(str(npz['__meta__'])).items():
+                n = meta.pop('key')
+                ndim = meta.pop('ndim')
+                yield name, {
+                    'meta': meta,
+                    'tables': [npz[f'{n}.dim{d}'] for d in range(ndim)],
+                    'hits': npz[f'{n}.hits'],
+                    'valid': npz[f'{n}.valid']}
+
+    @classmethod
+    def load(cls, fname: str):
+        snapshot = cls()
+        for name, rec in cls.iter_file(fname):
+            snapshot.items[name] = rec
+        return snapshot
+
+    def delta(self, prev):
+        """Snapshot of hits added since 'prev' snapshot. Items with no new hits are skipped."""
+        delta = CoverageSnapshot()
+        for name, rec in self.items.items():
+            prev_rec = prev.items.get(name, None) if prev is not None else None
+            if prev_rec is None or not self._same_tables(rec, prev_rec):
+                delta.items[name] = rec
+                continue
+            hits = rec['hits'] - prev_rec['hits']
+            if hits.any():
+                delta.items[name] = dict(rec, hits=hits)
+        return delta
+
+    @staticmethod
+    def _same_tables(rec: dict, other: dict) -> bool:
+        return len(rec['tables']) == len(other['tables']) and \
+            all(numpy.array_equal(a, b) for a, b in zip(rec['tables'], other['tables']))
+
+    def add(self, name: str, rec: dict):
+        """Sum item record into snapshot. Bin tables are aligned by names if differ."""
+        acc = self.items.get(name, None)
+        if acc is None:
+            self.items[name] = {'meta': rec['meta'], 'tables': list(rec['tables']),
+                                'hits': rec['hits'].astype(numpy.int64), 'valid': rec['valid'].copy()}
+            return
+        if self._same_tables(acc, rec):
+            acc['hits'] += rec['hits']
+            acc['valid'] |= rec['valid']
+            return
+        assert len(acc['tables']) == len(rec['tables']), f"Dimensions of {name} differ"
+        maps = []
+        for d, table in enumerate(rec['tables']):
+            pos = {bin_name: i for i, bin_name in enumerate(acc['tables'][d].tolist())}
+            new = [bin_name for bin_name in table.tolist() if bin_name not in pos]
+            if new:
+                acc['tables'][d] = numpy.concatenate([acc['tables'][d], numpy.array(new, dtype=str)])
+                pad = [(0, len(new) if dd == d else 0) for dd in range(len(acc['tables']))]
+                acc['hits'] = numpy.pad(acc['hits'], pad)
+                acc['valid'] = numpy.pad(acc['valid'], pad)
+                pos.update((bin_name, len(pos) + i) for i, bin_name in enumerate(new))
+            maps.append([pos[bin_name] for bin_name in table.tolist()])
+        idx = numpy.ix_(*maps)
+        acc['hits'][idx] += rec['hits']
+        acc['valid'][idx] |= rec['valid']
+
+    def merge(self, other):
+        for name, rec in other.items.items():
+            self.add(name, rec)
+        return self
+
+    def coverage(self, name: str) -> tuple:
+        """(coverage, size) of cover item"""
+        rec = self.items[name]
+        weight = rec['meta']['weight']
+        covered = numpy.count_nonzero(rec['valid'] & (rec['hits'] >= rec['meta']['at_least']))
+        return weight * int(covered), weight * int(numpy.count_nonzero(rec['valid']))
+
+    def cover_percentage(self, name: str) -> float:
+        coverage, size = self.coverage(name)
+        return 100.0 * coverage / size if size else 100.0
+
+    def _closure(self, name: str):
+        """Per dimension (total, uncovered) numbers of valid cells of every bin"""
+        rec = self.items[name]
+        uncovered = rec['valid'] & (rec['hits'] < rec['meta']['at_least'])
+        for d in range(rec['valid'].ndim):
+            axes = tuple(dd for dd in range(rec['valid'].ndim) if dd != d)
+            yield d, rec['valid'].sum(axis=axes), uncovered.sum(axis=axes)
+
+    def covered_bins(self, name: str) -> dict:
+        """Covered bins like cover item 'covered_bins': {bin: 0} for point, {cp_name: {cp_bin: 0}} for cross"""
+        rec = self.items[name]
+        covered = []
+        for d, total, uncovered in self._closure(name):
+            covered.append({_bin_key(bin_name): 0 for bin_name, n, u in
+                            zip(rec['tables'][d].tolist(), total.tolist(), uncovered.tolist()) if n > 0 and u == 0})
+        if rec['meta']['type'] == 'point':
+            return covered[0]
+        return dict(zip(rec['meta']['items'], covered))
+
+    def bin_cnt(self, name: str) -> dict:
+        """Cross 'bin_cnt': {cp_name: {cp_bin: number of uncovered cross bins}}. None for cover point."""
+        rec = self.items[name]
+        if rec['meta']['type'] == 'point':
+            return None
+        bin_cnt = {}
+        for d, total, uncovered in self._closure(name):
+            bin_cnt[rec['meta']['items'][d]] = {_bin_key(bin_name): u for bin_name, n, u in
+                                                zip(rec['tables'][d].tolist(), total.tolist(), uncovered.tolist())
+                                                if n > 0}
+        return bin_cnt
+
+    def report(self, logger=log.info):
+        for name in sorted(self.items, key=str.lower):
+            coverage, size = self.coverage(name)
+            logger(f'{name}: {self.cover_percentage(name):.2f}% ({coverage}/{size})')
+            if self.items[name]['meta']['type'] == 'cross':
+                for cp_name, bins in self.bin_cnt(name).items():
+                    covered = sum(1 for u in bins.values() if u == 0)
+                    logger(f'    {cp_name}: {covered}/{len(bins)} bins closed')
+
+
+class SnapshotWriter(object):
+    """Periodic coverage snapshots export: '<fname_base>.<n>.npz' files.
+        'delta' - store only hits added since previous snapshot (merge all the files to get total coverage)."""
+
+    def __init__(self, fname_base: str = 'coverage', delta: bool = True):
+        self.fname_base = fname_base
+        self.delta = delta
+        self.cnt = 0
+        self._prev = None
+
+    def write(self) -> str:
+        snapshot = CoverageSnapshot.from_db()
+        fname = f'{self.fname_base}.{self.cnt:06d}.npz'
+        (snapshot.delta(self._prev) if self.delta else snapshot).save(fname)
+        self._prev = snapshot
+        self.cnt += 1
+        return fname
+
+
+def merge_snapshots(files: Iterable[str], merged_fname: str = None) -> CoverageSnapshot:
+    """Sum snapshots (full or delta ones) reading them item by item"""
+    merged = CoverageSnapshot()
+    n = 0
+    for fname in files:
+        for name, rec in CoverageSnapshot.iter_file(fname):
+            merged.add(name, rec)
+        n += 1
+    log.info(f'Merged {n} coverage snapshots')
+    if merged_fname is not None:
+        merged.save(merged_fname)
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge coverage snapshots')
+    parser.add_argument('-o', '--output', default=None, help='merged snapshot file')
+    parser.add_argument('--report', action='store_true', help='print merged coverage')
+    parser.add_argument('files', nargs='+', help='snapshot files')
+    args = parser.parse_args(argv)
+    merged = merge_snapshots(args.files, args.output)
+    if args.report:
+        merged.report()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='%(message)s')
+    sys.exit(main())
@@ -3,12 +3,23 @@
 from typing import Any, Iterable, Dict
 
 from cocotb.handle import SimHandleBase
+from cocotb.triggers import Event, RisingEdge, ReadOnly
 from cocotb_bus.drivers import BusDriver as CocoTBBusDriver
 from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_profiler import profiler
 
 
 class BusDriver(CocoTBBusDriver):
+    """Bus driver.
+        1. Blocking mode (default): 'send(trx)' drives trx and returns when it's done
+        2. Pipelined mode ('max_queue' given): 'put(trx)' queues trx snapshot and returns as soon as
+           the queue has space. Queued trx are driven back-to-back by the driver thread.
+        3. Burst: 'send_burst(trxs)' drives list/array of trx on consecutive clocks with ready/valid handshake"""
+
     # _signals = None
+    _valid_signal = 'valid'  # bus signal names used by burst handshake (skipped if bus hasn't such signals)
+    _ready_signal = 'ready'
+    _data_signal = 'data'  # bus signal driven by scalar burst items (e.g. numpy array elements)
 
     def __init__(
         self,
@@ -17,6 +28,7 @@ class BusDriver(CocoTBBusDriver):
         name: str = None,
         clock: SimHandleBase = None,
         probes: Dict[str, SimHandleBase] = None,
+        max_queue: int = None,  # pipelined mode input queue depth
         **kwargs: Any
     ):
         self._signals = signals if signals is not None else self._signals
@@ -27,7 +39,35 @@ class BusDriver(CocoTBBusDriver):
             **kwargs)
         # probes
         self.probes = probes
+        # pipelined mode
+        self.max_queue = max_queue
+        self._queue_space = Event()
+        self._queue_idle = Event()
+        self._queue_idle.set()
+
+    @property
+    def pipelined(self) -> bool:
+        return self.max_queue is not None
+
+    async def put(self, trx: Transaction):
+        """Queue trx snapshot to be driven by driver thread. Wait while the queue is full."""
+        while len(self._sendQ) >= self.max_queue:
+            self._queue_space.clear()
+            await self._queue_space.wait()
+        self._queue_idle.clear()
+        self.append(trx.snapshot() if hasattr(trx, 'snapshot') else trx, callback=self._queue_sent)
+
+    def _queue_sent(self, trx: Transaction):
+        self._queue_space.set()
+        if not self._sendQ:
+            self._queue_idle.set()
 
+    async def wait_idle(self):
+        """Wait until all the queued trx are driven"""
+        if self._sendQ or not self._queue_idle.is_set():
+            await self._queue_idle.wait()
+
+    @profiler.measure('driver_send')
     async def _driver_send(self, trx: Transaction, sync: bool = True):
         self.check_trx(trx)
         await self.driver_send(trx)
@@ -36,6 +76,35 @@ class BusDriver(CocoTBBusDriver):
         """Implementation for BusDriver. May consume time."""
         raise NotImplementedError("Override ``driver_send`` method")
 
+    async def send_burst(self, trxs: Iterable, sync: bool = True):
+        """Drive trx one per clock. Beat is held while 'ready' is low. 'valid' is deasserted after the last beat."""
+        valid = self.bus._signals.get(self._valid_signal, None)
+        ready = self.bus._signals.get(self._ready_signal, None)
+        edge = RisingEdge(self.clock)
+        if sync:
+            await edge
+        for trx in trxs:
+            self.check_trx(trx)
+            self.drive(trx)
+            if valid is not None:
+                valid.value = 1
+            while True:
+                await ReadOnly()
+                accepted = ready is None or ready.value.binstr == '1'
+                await edge
+                if accepted:
+                    break
+        if valid is not None:
+            valid.value = 0
+
+    def drive(self, trx: Any):
+        """Assign trx to bus signals (no time consumed). Trx attributes are matched to bus signals by name,
+            scalar is assigned to data signal. To be overridden if needed."""
+        if hasattr(trx, '__dict__'):
+            self.bus.drive(trx)
+        else:
+            self.bus._signals[self._data_signal].value = int(trx)
+
     def check_trx(self, trx: Transaction):
         """Check applied trx consistency. To be overridden."""
         assert trx is not None
@@ -0,0 +1,167 @@
+# CocoTB. Bounded expected transactions queue
+
+import copy
+import pickle
+import tempfile
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from cocotb.triggers import Event
+
+
+class Prefetched(object):
+    """Expected trx snapshot with transformation func result being calculated in background.
+        Result is calculated on demand if there is no background job ('future' is None)."""
+
+    __slots__ = ('trx', 'future', 'x_fn')
+
+    def __init__(self, trx: Any, future: Future = None, x_fn: Callable = None):
+        self.trx = trx
+        self.future = future
+        self.x_fn = x_fn
+
+    def result(self):
+        """Wait for transformation func result"""
+        if self.future is None:
+            self.future = Future()
+            self.future.set_result(self.x_fn(self.trx))
+        return self.future.result()
+
+    def __eq__(self, other):
+        return self.trx == other
+
+    def __repr__(self):
+        return repr(self.trx)
+
+
+class ExpectedQueue(object):
+    """FIFO of expected trx with bounded memory. Used by BusMonitor instead of plain list.
+        1. 'max_pending' - sequencer backpressure: 'wait_space()' blocks while queue holds 'max_pending' trx
+        2. 'mem_capacity' - max number of trx kept in memory. The rest are spilled to temp file and loaded back
+           when memory part drains. Transaction is spilled as its items dict (see Transaction.to_dict()),
+           other objects are pickled. Prefetched trx isn't waited for: its result is spilled if it's ready,
+           otherwise background job is cancelled and transformation func is applied on demand after load.
+        Matched trx are removed from the queue by scoreboard (pop)."""
+
+    def __init__(self, max_pending: int = None, mem_capacity: int = None):
+        self.max_pending = max_pending
+        self.mem_capacity = mem_capacity
+        self._mem = deque()
+        self._spill_fid = None
+        self._spill_read_pos = 0
+        self._spill_cnt = 0
+        self._templates = {}  # {trx class: trx used to restore spilled trx}
+        self._x_fns = {}  # {id: transformation func of spilled Prefetched trx}
+        self._space = Event()
+
+    def __len__(self):
+        return len(self._mem) + self._spill_cnt
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += len(self)
+        self._load(index + 1)
+        return self._mem[index]
+
+    def __iter__(self):
+        yield from self._mem
+        if self._spill_cnt:
+            pos = self._spill_fid.tell()
+            self._spill_fid.seek(self._spill_read_pos)
+            for _ in range(self._spill_cnt):
+                yield self._unpack(pickle.load(self._spill_fid))
+            self._spill_fid.seek(pos)
+
+    def __delitem__(self, index):
+        if index == slice(None):
+            self.clear()
+        else:
+            self.pop(index)
+
+    def append(self, trx: Any):
+        if self._spill_cnt or (self.mem_capacity is not None and len(self._mem) >= self.mem_capacity):
+            self._spill(trx)
+        else:
+            self._mem.append(trx)
+
+    def pop(self, index: int = 0):
+        """Remove and return trx #index (the oldest one by default)"""
+        self._load(index + 1)
+        if index == 0:
+            trx = self._mem.popleft()
+        else:
+            trx = self._mem[index]
+            del self._mem[index]
+        if self._spill_cnt and len(self._mem) <= self.mem_capacity // 2:
+            self._load(self.mem_capacity)
+        if self.max_pending is not None and len(self) < self.max_pending:
+            self._space.set()
+        return trx
+
+    def clear(self):
+        self._mem.clear()
+        self._spill_reset()
+        self._space.set()
+
+    async def wait_space(self):
+        """Wait until queue can accept one more trx ('max_pending' backpressure)"""
+        while self.max_pending is not None and len(self) >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+
+    def _spill(self, trx: Any):
+        if self._spill_fid is None:
+            self._spill_fid = tempfile.TemporaryFile()
+        self._spill_fid.seek(0, 2)
+        pickle.dump(self._pack(trx), self._spill_fid, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spill_cnt += 1
+
+    def _load(self, n: int):
+        """Load spilled trx to memory until it holds at least 'n' trx"""
+        if len(self._mem) >= n or not self._spill_cnt:
+            return
+        self._spill_fid.seek(self._spill_read_pos)
+        while len(self._mem) < n and self._spill_cnt:
+            self._mem.append(self._unpack(pickle.load(self._spill_fid)))
+            self._spill_cnt -= 1
+        self._spill_read_pos = self._spill_fid.tell()
+        if not self._spill_cnt:
+            self._spill_reset()
+
+    def _spill_reset(self):
+        """Drop spilled data"""
+        if self._spill_fid is not None:
+            self._spill_fid.seek(0)
+            self._spill_fid.truncate()
+        self._spill_read_pos = 0
+        self._spill_cnt = 0
+
+    def _pack(self, trx: Any):
+        if isinstance(trx, Prefetched):
+            future = trx.future
+            if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+                return 'prefetched', self._pack(trx.trx), None, future.result()
+            if future is not None:
+                future.cancel()
+            self._x_fns[id(trx.x_fn)] = trx.x_fn
+            return 'prefetched', self._pack(trx.trx), id(trx.x_fn), None
+        to_dict = getattr(trx, 'to_dict', None)
+        if to_dict is not None:
+            if type(trx) not in self._templates:
+                self._templates[type(trx)] = copy.copy(trx)
+            return 'trx', type(trx), to_dict()
+        return 'obj', trx
+
+    def _unpack(self, rec: tuple):
+        if rec[0] == 'prefetched':
+            if rec[2] is not None:
+                return Prefetched(self._unpack(rec[1]), None, self._x_fns[rec[2]])
+            future = Future()
+            future.set_result(rec[3])
+            return Prefetched(self._unpack(rec[1]), future)
+        if rec[0] == 'trx':
+            trx = copy.copy(self._templates[rec[1]])
+            trx.from_dict(rec[2])
+            return trx
+        return rec[1]
@@ -0,0 +1,88 @@
+# CocoTB. Simulator stand-ins to create drivers/monitors and run them out of simulation
+
+import contextlib
+import logging
+from typing import Dict
+
+import cocotb
+from cocotb.handle import SimHandleBase
+
+
+class MockHandle(SimHandleBase):
+    """Stand-in of simulator signal handle: keeps assigned int value truncated to signal width"""
+
+    def __init__(self, name: str, width: int = 1):
+        self._handle = id(self)  # no GPI handle: object identity is used for hash/eq
+        self._len = width
+        self._sub_handles = {}
+        self._invalid_sub_handles = set()
+        self._name = name
+        self._type = 'GPI_MOCK'
+        self._fullname = f'{name}({self._type})'
+        self._path = name
+        self._log = logging.getLogger(f'cocotb.{name}')
+        self._def_name = ''
+        self._def_file = ''
+        self._mask = (1 << width) - 1
+        self._value = 0
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    @value.setter
+    def value(self, val):
+        self._value = int(val) & self._mask
+
+
+class MockClock(MockHandle):
+    """Clock stand-in: 'tick()' calls registered funcs (DUT model, monitors sampling) once per clock"""
+
+    def __init__(self, name: str = 'clk'):
+        super().__init__(name, 1)
+        self.cycles = 0
+        self._edge_callbacks = []
+
+    def add_edge_callback(self, func):
+        self._edge_callbacks.append(func)
+
+    def tick(self, n: int = 1):
+        for _ in range(n):
+            self.cycles += 1
+            for func in self._edge_callbacks:
+                func()
+
+
+class MockEntity(MockHandle):
+    """DUT stand-in holding signals {name: width} as attributes (bus signals are looked up by Bus as usual)"""
+
+    def __init__(self, name: str, signals: Dict[str, int]):
+        super().__init__(name, 1)
+        for sig_name, width in signals.items():
+            setattr(self, sig_name, MockHandle(f'{name}.{sig_name}', width))
+
+
+class _MockTask(object):
+    def kill(self):
+        pass
+
+
+class _MockScheduler(object):
+    """Stand-in of cocotb scheduler: background coroutines of drivers/monitors are not run.
+        Their per clock work is done by MockClock callbacks."""
+
+    def start_soon(self, coro):
+        coro.close()
+        return _MockTask()
+
+
+@contextlib.contextmanager
+def mock_scheduler():
+    """Allow drivers/monitors creation out of simulation"""
+    scheduler = cocotb.scheduler
+    if scheduler is None:
+        cocotb.scheduler = _MockScheduler()
+    try:
+        yield
+    finally:
+        cocotb.scheduler = scheduler
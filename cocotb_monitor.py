@@ -1,14 +1,40 @@
 # CocoTB. Base Monitor class
 
 from typing import Iterable, Dict
+import numpy
+
 from cocotb.handle import SimHandleBase
+from cocotb.triggers import RisingEdge, ReadOnly
 from cocotb_bus.monitors import BusMonitor as CocoTBBusMonitor
 
+from cocotb_util.cocotb_expected import ExpectedQueue
+from cocotb_util.cocotb_transaction import TrxPool
+from cocotb_util.cocotb_profiler import profiler
+
+
+_XZ_TO_0 = str.maketrans('xXzZuUwWlLhH-', '0000000000110')
+
+
+def _resolve_int(value) -> int:
+    """Int of signal value. Unresolved (X, Z, ...) bits are taken as 0."""
+    try:
+        return int(value)
+    except ValueError:
+        return int(value.binstr.translate(_XZ_TO_0), 2)
+
 
 class BusMonitor(CocoTBBusMonitor):
-    """"""
+    """Bus monitor.
+        1. Default mode: trx returned by 'receive()' are passed to callbacks one by one
+        2. Batch sampling mode ('sample_batch' given): bus signals (or one concatenated 'sample_vector' signal)
+           are captured once per clock into preallocated buffer (uint64, or Python ints if some signal is wider
+           than 64 bits; X/Z bits are captured as 0). Every 'sample_batch' clocks the buffer is decoded
+           by 'decode_batch()' using vectorized ops and trx batch is passed to batch callbacks
+           (e.g. CoverProcessor.collect_batch) and to per trx callbacks (e.g. Scoreboard)"""
 
     _signals = None
+    _valid_signal = 'valid'  # bus signal names (or 'sample_fields' names) qualifying captured beats
+    _ready_signal = 'ready'
 
     def __init__(
         self,
@@ -17,6 +43,14 @@ class BusMonitor(CocoTBBusMonitor):
         name: str = None,
         clock: SimHandleBase = None,
         probes: Dict[str, SimHandleBase] = None,
+        max_expected: int = None,  # max number of pending expected trx (sequencer backpressure)
+        max_expected_mem: int = None,  # max number of expected trx kept in memory (the rest are spilled to disk)
+        snapshot_expected: bool = False,  # store snapshot of expected trx instead of trx object itself
+        trx_pool: TrxPool = None,  # pool to take expected trx snapshots from (see Scoreboard 'recycle')
+        sample_batch: int = None,  # batch sampling mode: number of clocks captured before decode
+        sample_vector: str = None,  # bus signal holding all the fields concatenated (all bus signals if None)
+        sample_fields: Dict[str, tuple] = None,  # {field: (lsb, width)} of 'sample_vector'
+        trx_cls: type = None,  # trx class created by default 'decode_batch()'
         **kwargs
     ):
         self._signals = signals if signals is not None else self._signals
@@ -26,18 +60,121 @@ class BusMonitor(CocoTBBusMonitor):
             clock=clock,
             **kwargs)
         self.probes = probes
-        self.expected = []
+        if max_expected is None and max_expected_mem is None:
+            self.expected = []
+        else:
+            self.expected = ExpectedQueue(max_pending=max_expected, mem_capacity=max_expected_mem)
+        self.snapshot_expected = snapshot_expected
+        self.trx_pool = trx_pool
+        # batch sampling
+        self.sample_batch = sample_batch
+        self.sample_vector = sample_vector
+        self.sample_fields = sample_fields
+        self.trx_cls = trx_cls
+        self._batch_callbacks = []
+        if sample_batch is not None:
+            self._handles = [self.bus._signals[sample_vector]] if sample_vector is not None else \
+                list(self.bus._signals.values())
+            self._columns = [sample_vector] if sample_vector is not None else list(self.bus._signals)
+            self._widths = [len(handle) for handle in self._handles]
+            self._wide = max(self._widths) > 64
+            self._samples = numpy.zeros((sample_batch, len(self._handles)), dtype=object if self._wide else numpy.uint64)
+            self._sample_cnt = 0
+        self.prefetch = None  # optional func wrapping expected trx (set by Scoreboard to prefetch reference model)
 
     def add_expected(self, trx):
         """Store expected receive transactions to be checked in scoreboard"""
+        if self.snapshot_expected:
+            trx = trx.snapshot(self.trx_pool)
+        if self.prefetch is not None:
+            trx = self.prefetch(trx)
         self.expected.append(trx)
 
+    async def wait_expected_space(self):
+        """Wait until expected trx queue can accept one more trx (see 'max_expected')"""
+        if isinstance(self.expected, ExpectedQueue):
+            await self.expected.wait_space()
+
+    def add_batch_callback(self, callback):
+        """Add func called with decoded trx batch: 'callback(trxs, columns)' (batch sampling mode)"""
+        self._batch_callbacks.append(callback)
 
     async def receive(self):
         """Receive function. To be overridden."""
         raise NotImplementedError("Override ``receive`` method")
 
     async def _monitor_recv(self):
+        if self.sample_batch is not None:
+            await self._sample_bus()
+        receive = profiler.measure('receive')(self.receive)
         while True:
             self.log.debug('_monitor_recv')
-            self._recv(await self.receive())
+            self._recv(await receive())
+
+    async def _sample_bus(self):
+        """Capture bus every clock into samples buffer"""
+        edge = RisingEdge(self.clock)
+        while True:
+            await edge
+            await ReadOnly()
+            self.sample()
+
+    def sample(self):
+        """Capture current values of bus signals (one clock). Decode the buffer when it's full."""
+        row = self._samples[self._sample_cnt]
+        for n, handle in enumerate(self._handles):
+            row[n] = _resolve_int(handle.value)
+        self._sample_cnt += 1
+        if self._sample_cnt == self.sample_batch:
+            self.flush_samples()
+
+    def flush_samples(self):
+        """Decode captured samples and pass trx to callbacks"""
+        if self.sample_batch is None or not self._sample_cnt:
+            return
+        samples = self._samples[:self._sample_cnt]
+        self._sample_cnt = 0
+        columns = {name: samples[:, n] for n, name in enumerate(self._columns)}
+        if self._wide:  # Python ints buffer: columns of up to 64 bits are converted back to uint64
+            columns = {name: self._narrow(column, width) for (name, column), width in zip(columns.items(), self._widths)}
+        if self.sample_vector is not None:
+            vector = columns.pop(self.sample_vector)
+            for name, (lsb, width) in self.sample_fields.items():
+                if self._wide:
+                    columns[name] = self._narrow((vector >> lsb) & ((1 << width) - 1), width)
+                else:
+                    columns[name] = (vector >> numpy.uint64(lsb)) & numpy.uint64((1 << width) - 1)
+        valid = numpy.ones(len(samples), dtype=bool)
+        for name in (self._valid_signal, self._ready_signal):
+            if name in columns:
+                valid &= columns[name] == 1
+        if not valid.all():
+            columns = {name: column[valid] for name, column in columns.items()}
+        self._recv_batch(self.decode_batch(columns), columns)
+
+    @staticmethod
+    def _narrow(column: numpy.ndarray, width: int) -> numpy.ndarray:
+        """uint64 column of Python ints column if values fit"""
+        return column.astype(numpy.uint64) if width <= 64 else column
+
+    def decode_batch(self, columns: Dict[str, numpy.ndarray]) -> list:
+        """Create trx from columns of valid beats. By default 'trx_cls' trx with matching items are created.
+            To be overridden if needed."""
+        if self.trx_cls is None:
+            raise NotImplementedError("Override ``decode_batch`` method or set 'trx_cls'")
+        lists = None
+        trxs = []
+        for n in range(len(next(iter(columns.values()), []))):
+            trx = self.trx_cls() if self.trx_pool is None else self.trx_pool.acquire(self.trx_cls)
+            if lists is None:
+                lists = {name: column.tolist() for name, column in columns.items() if name in trx._items}
+            for name, values in lists.items():
+                setattr(trx, name, values[n])
+            trxs.append(trx)
+        return trxs
+
+    def _recv_batch(self, trxs: list, columns: Dict[str, numpy.ndarray]):
+        for callback in self._batch_callbacks:
+            callback(trxs, columns)
+        for trx in trxs:
+            self._recv(trx)
@@ -0,0 +1,67 @@
+# CocoTB. Debug probes manager
+
+import os
+
+import cocotb
+from cocotb.triggers import ReadWrite
+from cocotb.handle import SimHandleBase
+
+
+class ProbeManager(object):
+    """Registry of debug probes written to waveforms.
+        1. Keep last value written to every probe handle and drop redundant writes
+        2. Collect pending updates and flush them once per timestep in ReadWrite phase
+        3. Global on/off switch ('COCOTB_PROBES=0' env var or disable()) to skip probe processing at all"""
+
+    def __init__(self, enabled: bool = True, deferred: bool = True):
+        self.enabled = enabled
+        self.deferred = deferred  # flush at ReadWrite phase or write immediately
+        self._last = {}  # {probe: last written value}
+        self._pending = {}  # {probe: value to be written at flush}
+        self._flush_task = None  # scheduled flush task (killed if test ends before ReadWrite phase)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        """Disable probes. Drop pending updates."""
+        self.enabled = False
+        self._pending.clear()
+
+    def reset(self):
+        """Forget written values. Next write to every probe is unconditional."""
+        self._last.clear()
+        self._pending.clear()
+
+    def write(self, probe: SimHandleBase, val):
+        """Schedule probe update if value was changed"""
+        if not self.enabled:
+            return
+        if probe not in self._pending:
+            if self._last.get(probe, None) == val:
+                return
+            if not self.deferred:
+                self._last[probe] = val
+                probe.value = val
+                return
+        self._pending[probe] = val
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = cocotb.start_soon(self._flush())
+
+    async def _flush(self):
+        """Write all the pending updates at the end of current timestep"""
+        await ReadWrite()
+        self.flush()
+
+    def flush(self):
+        """Write all the pending updates right now"""
+        self._flush_task = None
+        pending, self._pending = self._pending, {}
+        for probe, val in pending.items():
+            if self._last.get(probe, None) != val:
+                self._last[probe] = val
+                probe.value = val
+
+
+# global probes registry
+probe_manager = ProbeManager(enabled=os.environ.get('COCOTB_PROBES', '1') != '0')
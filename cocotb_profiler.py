@@ -0,0 +1,142 @@
+# CocoTB. Hot path profiler
+
+import inspect
+import logging
+import os
+import time
+from functools import wraps
+
+from cocotb.utils import get_sim_time
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class Stage(object):
+    """Calls number, wall time and latency histogram (log2 ns buckets) of profiled stage"""
+
+    __slots__ = ('name', 'is_async', 'calls', 'total_ns', 'max_ns', 'hist')
+
+    def __init__(self, name: str, is_async: bool = False):
+        self.name = name
+        self.is_async = is_async  # wall time includes simulator time spent while awaiting
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.hist = [0] * 64
+
+    def add(self, dt_ns: int):
+        self.calls += 1
+        self.total_ns += dt_ns
+        self.hist[dt_ns.bit_length()] += 1
+        if dt_ns > self.max_ns:
+            self.max_ns = dt_ns
+
+    def percentile(self, p: float) -> int:
+        """Latency (ns, bucket upper bound) of 'p' percentile"""
+        limit = self.calls * p / 100
+        cnt = 0
+        for n, hits in enumerate(self.hist):
+            cnt += hits
+            if hits and cnt >= limit:
+                return (1 << n) - 1
+        return 0
+
+
+class Profiler(object):
+    """Hot path stages instrumentation (randomize, driver_send, receive, compare, coverage, report).
+        1. Methods are instrumented by 'measure(stage)' decorator. Profiler is enabled by 'COCOTB_PROFILE=1' env var
+           at import: when disabled, decorator returns func as is, so there is no overhead at all
+        2. status() - one line of stages rates and simulated to wall time ratio since previous status
+        3. summary() - per stage calls, throughput, share of wall time, latency percentiles"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.stages = {}  # {name: Stage}
+        self.reset()
+
+    def reset(self):
+        for stage in self.stages.values():
+            stage.__init__(stage.name, stage.is_async)
+        self._start = time.perf_counter()
+        self._last = (self._start, self._sim_ns(), {})
+
+    def stage(self, name: str, is_async: bool = False) -> Stage:
+        stage = self.stages.get(name, None)
+        if stage is None:
+            stage = self.stages[name] = Stage(name, is_async)
+        return stage
+
+    def measure(self, name: str):
+        """Decorator measuring func (or coroutine func) calls as stage 'name'"""
+        def decorate(func):
+            if not self.enabled:
+                return func
+            timer = time.perf_counter_ns
+            if inspect.iscoroutinefunction(func):
+                stage = self.stage(name, is_async=True)
+
+                @wraps(func)
+                async def inner(*args, **kwargs):
+                    start = timer()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        stage.add(timer() - start)
+            else:
+                stage = self.stage(name)
+
+                @wraps(func)
+                def inner(*args, **kwargs):
+                    start = timer()
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        stage.add(timer() - start)
+            return inner
+        return decorate
+
+    @staticmethod
+    def _sim_ns() -> float:
+        try:
+            return get_sim_time('ns')
+        except Exception:  # out of simulation
+            return 0
+
+    def status(self, logger=log.info):
+        """Report stages rates (calls/sec) and sim/wall time ratio since previous status"""
+        if not self.enabled:
+            return
+        now, sim_ns = time.perf_counter(), self._sim_ns()
+        last_time, last_sim_ns, last_calls = self._last
+        wall = max(now - last_time, 1e-9)
+        rates = ' '.join(f'{name}: {(stage.calls - last_calls.get(name, 0)) / wall:.0f}/s'
+                         for name, stage in self.stages.items())
+        logger(f'Profile: {rates} | sim {(sim_ns - last_sim_ns) / wall:.1f} ns per wall sec')
+        self._last = (now, sim_ns, {name: stage.calls for name, stage in self.stages.items()})
+
+    def summary(self, logger=log.info):
+        """Report per stage statistics since start (or reset)"""
+        if not self.enabled:
+            return
+        wall = max(time.perf_counter() - self._start, 1e-9)
+        sim_ns = self._sim_ns()
+        logger(f'Profile summary: wall {wall:.2f}s, sim {sim_ns:.0f}ns, {sim_ns / wall:.1f} sim ns per wall sec')
+        logger(f"{'stage':<14}{'calls':>10}{'calls/s':>12}{'total s':>10}{'wall %':>8}"
+               f"{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+        python_ns = 0
+        for name, stage in self.stages.items():
+            if not stage.calls:
+                continue
+            if not stage.is_async:
+                python_ns += stage.total_ns
+            logger(f"{name + ('*' if stage.is_async else ''):<14}{stage.calls:>10}{stage.calls / wall:>12.1f}"
+                   f"{stage.total_ns / 1e9:>10.3f}{100 * stage.total_ns / 1e9 / wall:>8.1f}"
+                   f"{stage.total_ns / stage.calls / 1e3:>10.2f}{stage.percentile(50) / 1e3:>10.2f}"
+                   f"{stage.percentile(99) / 1e3:>10.2f}{stage.max_ns / 1e3:>10.2f}")
+        logger(f'* - includes simulator time. Python (sync stages) share of wall time: '
+               f'{100 * python_ns / 1e9 / wall:.1f}%')
+
+
+# global profiler
+profiler = Profiler(enabled=os.environ.get('COCOTB_PROFILE', '0') != '0')
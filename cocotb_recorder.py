@@ -0,0 +1,147 @@
+# CocoTB. Buffered transaction recorder
+
+import atexit
+import json
+import logging
+import mmap
+import os
+import os.path as osp
+import pickle
+import struct
+import numpy
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class TrxRecorder(object):
+    """Store trx to file keeping file handle opened and batching writes in a buffer.
+        Supported formats (both are read back by read()/index() and Transaction loaders):
+            'json' - json line per trx
+            'bin' - length-prefixed pickled trx
+        One recorder is shared per file name (see get()). All the recorders are flushed on test end,
+        on timeout and on scoreboard assertion (see flush_all()) and closed on test end (see close_all())."""
+
+    _recorders = {}  # {fname: recorder}
+    _reset_files = set()  # files reset during current test
+    _len_fmt = struct.Struct('<I')
+
+    def __init__(self, fname: str, fmt: str = 'json', buffer_size: int = 1 << 16):
+        assert fmt in ('json', 'bin'), f"Unsupported trx recorder format: '{fmt}'"
+        self.fname = fname
+        self.fmt = fmt
+        self.buffer_size = buffer_size
+        self._fid = None
+
+    @classmethod
+    def get(cls, fname: str, fmt: str = 'json', **kwargs):
+        """Get recorder for 'fname'. Create it if not exists."""
+        recorder = cls._recorders.get(fname, None)
+        if recorder is None:
+            recorder = cls._recorders[fname] = cls(fname, fmt, **kwargs)
+        assert recorder.fmt == fmt, f"Trx recorder '{fname}' already opened with format '{recorder.fmt}'"
+        return recorder
+
+    @classmethod
+    def reset_file(cls, fname: str, once: bool = False):
+        """Close recorder (if any) and remove file stored at previous run.
+            'once' - skip if file was already reset during current test (till close_all())"""
+        if once and fname in cls._reset_files:
+            return
+        cls._reset_files.add(fname)
+        recorder = cls._recorders.pop(fname, None)
+        if recorder is not None:
+            recorder.close()
+        if osp.isfile(fname):
+            os.remove(fname)
+
+    @classmethod
+    def flush_file(cls, fname: str):
+        """Flush recorder (if any) writing to 'fname' """
+        recorder = cls._recorders.get(fname, None)
+        if recorder is not None:
+            recorder.flush()
+
+    @classmethod
+    def flush_all(cls):
+        for recorder in cls._recorders.values():
+            recorder.flush()
+
+    @classmethod
+    def close_all(cls):
+        for recorder in cls._recorders.values():
+            recorder.close()
+        cls._recorders.clear()
+        cls._reset_files.clear()
+
+    def write(self, trx: dict):
+        if self._fid is None:
+            self._fid = open(self.fname, 'ab', buffering=self.buffer_size)
+        if self.fmt == 'json':
+            self._fid.write(json.dumps(trx).encode() + b'\n')
+        else:
+            data = pickle.dumps(trx, protocol=pickle.HIGHEST_PROTOCOL)
+            self._fid.write(self._len_fmt.pack(len(data)))
+            self._fid.write(data)
+
+    def flush(self):
+        if self._fid is not None:
+            self._fid.flush()
+
+    def close(self):
+        if self._fid is not None:
+            self._fid.close()
+            self._fid = None
+
+    @classmethod
+    def read(cls, fname: str, fmt: str = 'json', offset: int = 0):
+        """Stored trx generator. 'offset' - file position of first trx to read (see index())."""
+        cls.flush_file(fname)
+        with open(fname, 'rb') as fid:
+            fid.seek(offset)
+            if fmt == 'json':
+                for trx_str in fid:
+                    if trx_str.strip():
+                        yield json.loads(trx_str)
+            else:
+                while True:
+                    header = fid.read(cls._len_fmt.size)
+                    if len(header) < cls._len_fmt.size:
+                        break
+                    size = cls._len_fmt.unpack(header)[0]
+                    data = fid.read(size)
+                    if len(data) < size:  # truncated last trx
+                        break
+                    yield pickle.loads(data)
+
+    @classmethod
+    def index(cls, fname: str, fmt: str = 'json', chunk_size: int = 1 << 24):
+        """Start offsets of stored trx (int64 array).
+            'json' - file is memory-mapped and scanned for line ends chunk by chunk.
+            'bin' - length prefixes are walked without unpickling trx."""
+        cls.flush_file(fname)
+        size = osp.getsize(fname)
+        if size == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        with open(fname, 'rb') as fid, mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if fmt == 'json':
+                offsets = [numpy.zeros(1, dtype=numpy.int64)]
+                for pos in range(0, size, chunk_size):
+                    chunk = numpy.frombuffer(mm, dtype=numpy.uint8, count=min(chunk_size, size - pos), offset=pos)
+                    offsets.append(numpy.flatnonzero(chunk == ord('\n')).astype(numpy.int64) + pos + 1)
+                    del chunk  # release buffer before mmap closed
+                offsets = numpy.concatenate(offsets)
+                if offsets[-1] >= size:  # no trx after last line end
+                    offsets = offsets[:-1]
+                return offsets
+            offsets = []
+            pos = 0
+            while pos + cls._len_fmt.size <= size:
+                end = pos + cls._len_fmt.size + cls._len_fmt.unpack_from(mm, pos)[0]
+                if end > size:  # truncated last trx
+                    break
+                offsets.append(pos)
+                pos = end
+            return numpy.array(offsets, dtype=numpy.int64)
+
+atexit.register(TrxRecorder.close_all)
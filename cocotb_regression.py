@@ -0,0 +1,153 @@
+# CocoTB. Multi-seed regression runner
+
+import argparse
+import glob
+import importlib
+import logging
+import os
+import os.path as osp
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List
+from xml.etree import ElementTree
+
+cocotb_coverage = importlib.import_module('cocotb-coverage.cocotb_coverage.coverage')
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+def run_seed(
+        cmd: List[str],
+        seed: int,
+        run_dir: str,
+        cwd: str = None,
+        timeout_hours: int = None,
+        kill_timeout_sec: float = None,
+        env: dict = None,
+        coverage_fname: str = 'coverage.xml',
+        store_trx_pattern: str = 'store_trx*.txt') -> dict:
+    """Run simulation 'cmd' with given seed. Seed outputs (log, results, coverage, stored trx, sim build) are
+        written to 'run_dir'. 'cmd' is run in 'cwd' (e.g. dir of cocotb Makefile), 'run_dir' by default.
+        Return run result dict:
+        seed, run_dir, passed, returncode, tests/failures (from cocotb results file), duration,
+        coverage (exported coverage file or None), failed_trx (stored trx files of failed seed, see TrxRecorder.read())"""
+    run_dir = osp.abspath(run_dir)
+    os.makedirs(run_dir, exist_ok=True)
+    results_fname = osp.join(run_dir, 'results.xml')
+    coverage_fname = osp.join(run_dir, coverage_fname)
+    for fname in (results_fname, coverage_fname):
+        if osp.isfile(fname):
+            os.remove(fname)
+
+    run_env = dict(os.environ, **(env or {}))
+    run_env['RANDOM_SEED'] = str(seed)
+    run_env['COCOTB_START_TIME_SECONDS'] = str(int(time.time()))
+    run_env['COCOTB_RESULTS_FILE'] = results_fname
+    run_env['COCOTB_COVERAGE_FILE'] = coverage_fname  # exported by CoverProcessor.final_report()
+    run_env['SIM_BUILD'] = osp.join(run_dir, 'sim_build')
+    run_env['COCOTB_RUN_DIR'] = run_dir  # dir of trx stored by Transaction
+    if timeout_hours is not None:
+        run_env['COCOTB_TIMEOUT_HOURS'] = str(timeout_hours)
+
+    start = time.time()
+    with open(osp.join(run_dir, 'run.log'), 'w') as log_fid:
+        try:
+            returncode = subprocess.run(cmd, cwd=cwd if cwd is not None else run_dir, env=run_env,
+                                        stdout=log_fid, stderr=subprocess.STDOUT, timeout=kill_timeout_sec).returncode
+        except subprocess.TimeoutExpired:
+            returncode = None
+
+    tests, failures = _parse_results(results_fname)
+    passed = returncode == 0 and tests > 0 and failures == 0
+    return {
+        'seed': seed,
+        'run_dir': run_dir,
+        'passed': passed,
+        'returncode': returncode,
+        'tests': tests,
+        'failures': failures,
+        'duration': time.time() - start,
+        'coverage': coverage_fname if osp.isfile(coverage_fname) else None,
+        'failed_trx': [] if passed else sorted(glob.glob(osp.join(run_dir, store_trx_pattern)))}
+
+
+def _parse_results(fname: str) -> tuple:
+    """Number of tests and failed tests in cocotb (JUnit) results file"""
+    if not osp.isfile(fname):
+        return 0, 0
+    root = ElementTree.parse(fname).getroot()
+    testcases = list(root.iter('testcase'))
+    failures = sum(1 for testcase in testcases if testcase.find('failure') is not None or
+                   testcase.find('error') is not None)
+    return len(testcases), failures
+
+
+def run_regression(
+        cmd: List[str],
+        seeds: Iterable[int],
+        outdir: str = 'regression',
+        workers: int = None,
+        merged_coverage: str = None,
+        **kwargs) -> List[dict]:
+    """Run simulations for every seed in parallel ('workers' - number of CPUs by default). Simulations are
+        subprocesses, so they are driven by threads.
+        Every seed is run in own 'outdir/seed_<seed>' dir (see run_seed() for kwargs).
+        Coverage exported by seeds is merged to 'merged_coverage' file (same format).
+        Return run results sorted by seed."""
+    outdir = osp.abspath(outdir)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(run_seed, cmd, seed, osp.join(outdir, f'seed_{seed}'), **kwargs) for seed in seeds]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            log.info(f"Seed {result['seed']}: {'PASS' if result['passed'] else 'FAIL'} "
+                     f"({result['failures']}/{result['tests']} failed, {result['duration']:.1f}s)")
+    results.sort(key=lambda result: result['seed'])
+
+    passed = sum(result['passed'] for result in results)
+    log.info(f'Regression finished: {passed}/{len(results)} seeds passed')
+    for result in results:
+        if not result['passed']:
+            log.info(f"Failed seed {result['seed']}: {result['run_dir']}")
+
+    if merged_coverage is not None:
+        files = [result['coverage'] for result in results if result['coverage'] is not None]
+        if files:
+            cocotb_coverage.merge_coverage(log.info, merged_coverage, *files)
+        else:
+            log.warning('No coverage exported by seeds')
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Run simulation command for many seeds in parallel')
+    parser.add_argument('-n', '--seeds', type=int, default=os.cpu_count(), help='number of seeds')
+    parser.add_argument('--first-seed', type=int, default=None, help='first seed (random by default)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='parallel simulations')
+    parser.add_argument('-o', '--outdir', default='regression', help='output dir')
+    parser.add_argument('-C', '--cwd', default=None, help='dir to run simulation command in (seed dir by default)')
+    parser.add_argument('--timeout-hours', type=int, default=None, help='test timeout (COCOTB_TIMEOUT_HOURS)')
+    parser.add_argument('--coverage', default='coverage.xml', help='per seed coverage file name (.xml/.yml)')
+    parser.add_argument('--merged-coverage', default=None, help='merged coverage file')
+    parser.add_argument('cmd', nargs=argparse.REMAINDER, help='simulation command, e.g. make')
+    args = parser.parse_args(argv)
+    cmd = args.cmd[1:] if args.cmd[:1] == ['--'] else args.cmd
+    assert cmd, "Simulation command required"
+
+    first_seed = args.first_seed if args.first_seed is not None else int(time.time())
+    merged_coverage = args.merged_coverage
+    if merged_coverage is None:
+        merged_coverage = osp.join(args.outdir, 'merged_' + osp.basename(args.coverage))
+    results = run_regression(cmd, range(first_seed, first_seed + args.seeds), outdir=args.outdir,
+                             workers=args.workers, merged_coverage=merged_coverage, cwd=args.cwd,
+                             timeout_hours=args.timeout_hours, coverage_fname=args.coverage)
+    return 0 if all(result['passed'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='%(message)s')
+    sys.exit(main())
@@ -1,56 +1,337 @@
 # CocoTB. Base Transaction class
-from typing import Any
+import copy
+import logging
+import pickle
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable
+import numpy
 
 from cocotb.handle import SimHandleBase
 from cocotb_bus.scoreboard import Scoreboard as CocoTBScoreboard
 from cocotb.result import TestSuccess
 
-from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_transaction import Transaction, TrxPool
+from cocotb_util.cocotb_expected import Prefetched
+from cocotb_util.cocotb_recorder import TrxRecorder
+from cocotb_util.cocotb_profiler import profiler
+
+
+def _x_fn_on_items(x_fn: Callable, trx_cls: type, items: dict):
+    """Process prefetch worker: transformation func of trx of the same class restored from items dict"""
+    trx = trx_cls.__new__(trx_cls)
+    trx.from_dict(items)
+    return x_fn(trx)
+
+
+class KeyedExpected(object):
+    """Expected trx indexed by key for out-of-order matching. Trx with the same key are matched in order.
+        Added trx are transformed and indexed lazily: only until the key being looked up is found,
+        so prefetch results of the rest aren't waited for."""
+
+    def __init__(self, key_fn: Callable):
+        self.key_fn = key_fn
+        self._queues = {}  # {key: deque((exp, expected_val), ...)}
+        self._pending = deque()  # added trx not indexed yet
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for queue in self._queues.values():
+            for exp, _ in queue:
+                yield exp
+        for exp in self._pending:
+            yield exp.trx if isinstance(exp, Prefetched) else exp
+
+    def add(self, exp: Any):
+        """Add expected trx to be indexed on demand (see 'pop()')"""
+        self._pending.append(exp)
+        self._len += 1
+
+    def push(self, exp: Any, expected_val: Any):
+        """Add expected trx. Key is calculated using transformed expected value."""
+        key = self.key_fn(expected_val)
+        try:
+            self._queues[key].append((exp, expected_val))
+        except KeyError:
+            self._queues[key] = deque(((exp, expected_val),))
+        self._len += 1
+
+    def pop(self, key: Any, transform: Callable = None):
+        """Get oldest (exp, expected_val) with given key. Return None if not found.
+            Pending trx are indexed in order till the key is found ('transform' - func of trx returning
+            (expected_val, exp) e.g. Scoreboard._transform)."""
+        queue = self._queues.get(key, None)
+        while queue is None and self._pending:
+            expected_val, exp = transform(self._pending.popleft())
+            self._len -= 1
+            self.push(exp, expected_val)
+            queue = self._queues.get(key, None)
+        if queue is None:
+            return None
+        item = queue.popleft()
+        if not queue:
+            del self._queues[key]
+        self._len -= 1
+        return item
+
+
+class BufferCompare(object):
+    """Compare func for numpy array / bytes payloads. Whole buffers are compared at once.
+        Mismatch description (number of differing elements, first differing index) is built only on mismatch.
+        'payload' - optional func extracting payload from trx."""
+
+    def __init__(self, payload: Callable = None):
+        self.payload = payload
+
+    def _buffer(self, trx: Any):
+        return self.payload(trx) if self.payload is not None else trx
+
+    def __call__(self, got: Any, exp: Any) -> bool:
+        got, exp = self._buffer(got), self._buffer(exp)
+        if isinstance(got, (bytes, bytearray)) and isinstance(exp, (bytes, bytearray)):
+            return got == exp
+        return numpy.array_equal(got, exp)
+
+    def diff(self, got: Any, exp: Any) -> str:
+        """Describe mismatch between payloads"""
+        got, exp = self._as_array(self._buffer(got)), self._as_array(self._buffer(exp))
+        if got.shape != exp.shape:
+            return f"Received payload shape {got.shape} doesn't match expected one {exp.shape}"
+        got, exp = got.ravel(), exp.ravel()
+        idx = numpy.flatnonzero(got != exp)
+        if len(idx) == 0:
+            return "Received payload doesn't match expected one"
+        return f"{len(idx)} of {got.size} payload elements differ. " \
+               f"First at index {idx[0]}: received {got[idx[0]]}, expected {exp[idx[0]]}"
+
+    @staticmethod
+    def _as_array(buf: Any):
+        if isinstance(buf, (bytes, bytearray)):
+            return numpy.frombuffer(buf, dtype=numpy.uint8)
+        return numpy.asarray(buf)
 
 
 class Scoreboard(CocoTBScoreboard):
     def __init__(self, dut: SimHandleBase, fail_immediately=True):
         super().__init__(dut, fail_immediately=fail_immediately)
+        # default compare and transformation funcs for interfaces added without own ones
         self.compare_fn = lambda a, b: a == b
         self.x_fn = None
+        self.keyed = {}  # {monitor: KeyedExpected} for interfaces matched by key
+        self.executors = {}  # {'thread'/'process': Executor} used to prefetch expected values
 
     def add_interface(
             self,
             monitor,
             expected_output,
-            compare_fn=None,  # custom compare func
-            x_fn=None,  # transformation func
+            compare_fn=None,  # custom compare func for this interface
+            x_fn=None,  # transformation func for this interface
             reorder_depth=0,
-            strict_type=True):
+            strict_type=True,
+            key_fn=None,  # key func to match out-of-order trx, e.g. 'lambda trx: trx.id'
+            prefetch=None,  # run 'x_fn' in background: 'thread', 'process' or Executor instance
+            prefetch_workers: int = None,
+            recycle: TrxPool = None):  # pool to return matched trx to
+        """Add an interface to be scoreboarded.
+            'compare_fn' and 'x_fn' are applied to this interface only. Scoreboard defaults are used when not given.
+            When 'compare_fn' has 'diff(got, exp)' method (e.g. BufferCompare) it's used to report mismatch.
+            When 'key_fn' given: expected trx are indexed by 'key_fn(x_fn(exp))' and every received trx
+            is matched to the oldest expected one with 'key_fn(got)' key (any reorder depth). 'reorder_depth' is ignored.
+            Expected trx are indexed in order only until received key is found (prefetch results of the rest
+            aren't waited for).
+            When 'prefetch' given: 'x_fn' is started on a snapshot of expected trx as soon as it's added
+            using 'monitor.add_expected()' and compare waits for the result. Process prefetch: Transaction can't be
+            pickled (constraints), so 'x_fn' gets trx of the same class restored from its items (see to_dict()),
+            other trx attributes aren't set. 'x_fn' and trx class should be module level ones and 'x_fn' result
+            should be picklable.
+            When 'recycle' given: matched received trx and expected trx snapshots (monitor 'snapshot_expected')
+            are released to the pool. Received trx shouldn't be kept by other monitor callbacks then."""
+
+        if compare_fn is not None and not callable(compare_fn):
+            raise TypeError(f"Expected a callable compare function but got {str(type(compare_fn))}")
+        if x_fn is not None and not callable(x_fn):
+            raise TypeError(f"Expected a callable transformation function but got {str(type(x_fn))}")
+
+        if key_fn is not None:
+            if not callable(key_fn):
+                raise TypeError(f"Expected a callable key function but got {str(type(key_fn))}")
+            if callable(expected_output):
+                raise TypeError("Key matching requires expected output list rather than callable function")
+            check = self._keyed_check(monitor, expected_output, key_fn, compare_fn, x_fn, strict_type, recycle)
+        else:
+            check = self._ordered_check(monitor, expected_output, compare_fn, x_fn, reorder_depth, strict_type,
+                                        recycle)
 
         super().add_interface(
             monitor=monitor,
             expected_output=expected_output,
-            compare_fn=None,
+            compare_fn=check,
             reorder_depth=reorder_depth,
             strict_type=strict_type)
 
-        if compare_fn is not None:
-            if callable(compare_fn):
-                self.compare_fn = compare_fn
+        if prefetch is not None:
+            self._add_prefetch(monitor, x_fn if x_fn is not None else self.x_fn, prefetch, prefetch_workers)
+
+    def _add_prefetch(self, monitor, x_fn: Callable, prefetch, workers: int):
+        """Make monitor start 'x_fn' on expected trx in background when it's added"""
+        if x_fn is None:
+            raise TypeError("Prefetch requires transformation function")
+        if not hasattr(monitor, 'prefetch'):
+            raise TypeError(f"Prefetch isn't supported by {type(monitor).__qualname__}. Use BusMonitor.")
+        if isinstance(prefetch, Executor):
+            executor = prefetch
+        elif prefetch in ('thread', 'process'):
+            executor = self.executors.get(prefetch, None)
+            if executor is None:
+                pool = ThreadPoolExecutor if prefetch == 'thread' else ProcessPoolExecutor
+                executor = self.executors[prefetch] = pool(max_workers=workers)
+        else:
+            raise TypeError(f"Expected 'thread', 'process' or Executor prefetch but got {str(prefetch)}")
+        process = isinstance(executor, ProcessPoolExecutor)
+        if process:
+            try:
+                pickle.dumps(x_fn)
+            except Exception as e:
+                raise TypeError(f"Process prefetch requires picklable (module level) transformation function: {e}")
+
+        picklable = set()  # trx classes checked for process prefetch
+
+        def prefetch_fn(trx):
+            # snapshot trx: sequencer may update the same object before 'x_fn' done
+            if hasattr(trx, 'snapshot'):
+                snapshot = trx.snapshot(getattr(monitor, 'trx_pool', None))
+            else:
+                snapshot = copy.deepcopy(trx)
+            if process and hasattr(snapshot, 'to_dict'):
+                if type(snapshot) not in picklable:
+                    try:
+                        pickle.dumps(type(snapshot))
+                    except Exception as e:
+                        raise TypeError(f"Process prefetch requires picklable (module level) trx class: {e}")
+                    picklable.add(type(snapshot))
+                return Prefetched(snapshot, executor.submit(_x_fn_on_items, x_fn, type(snapshot), snapshot.to_dict()),
+                                  x_fn)
+            return Prefetched(snapshot, executor.submit(x_fn, snapshot), x_fn)
+
+        monitor.prefetch = prefetch_fn
+
+    def shutdown(self):
+        """Stop prefetch executors"""
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = {}
+
+    def _monitor_log(self, monitor):
+        if monitor.name:
+            return logging.getLogger(f"{self.log.name}.{monitor.name}")
+        return logging.getLogger(f"{self.log.name}.{type(monitor).__qualname__}")
+
+    @staticmethod
+    def _recycle(pool: TrxPool, monitor, got: Any, exp: Any):
+        """Return matched trx to the pool"""
+        if isinstance(got, Transaction):
+            pool.release(got)
+        if isinstance(exp, Prefetched):
+            exp = exp.trx
+        if isinstance(exp, Transaction) and getattr(monitor, 'snapshot_expected', False):
+            pool.release(exp)
+
+    def _ordered_check(self, monitor, expected_output, compare_fn, x_fn, reorder_depth: int, strict_type: bool,
+                       recycle: TrxPool = None):
+        """Create monitor callback matching received trx to expected ones in order (up to 'reorder_depth')"""
+        log = self._monitor_log(monitor)
+
+        def check_received_transaction(transaction):
+            if callable(expected_output):
+                exp = expected_output(transaction)
+            elif len(expected_output):  # we expect something
+                i = 0
+                for j in range(1, min((reorder_depth + 1), len(expected_output))):
+                    if expected_output[j] == transaction:
+                        i = j
+                        break
+                exp = expected_output.pop(i)
+            else:
+                self.errors += 1
+                log.error("Received a transaction but wasn't expecting anything")
+                log.info(f"Got: {repr(transaction)}")
+                if self._imm:
+                    TrxRecorder.flush_all()
+                assert not self._imm, "Received a transaction but wasn't expecting anything"
+                return
+
+            if self._compare_overridden:
+                match = self.compare(transaction, exp.trx if isinstance(exp, Prefetched) else exp, log, strict_type)
             else:
-                raise TypeError(f"Expected a callable compare function but got {str(type(compare_fn))}")
+                expected_val, exp = self._transform(exp, x_fn)
+                match = self._compare(transaction, exp, expected_val, log, strict_type, compare_fn)
+            if match and recycle is not None and not callable(expected_output):
+                self._recycle(recycle, monitor, transaction, exp)
+
+        return check_received_transaction
+
+    def _keyed_check(self, monitor, expected_output: list, key_fn: Callable, compare_fn, x_fn, strict_type: bool,
+                     recycle: TrxPool = None):
+        """Create monitor callback matching received trx to expected ones by key"""
+        keyed = self.keyed[monitor] = KeyedExpected(key_fn)
+        log = self._monitor_log(monitor)
 
-        if x_fn is not None:
-            if callable(x_fn):
-                self.x_fn = x_fn
+        def check_received_transaction(transaction):
+            # move expected trx added since previous call to the index
+            if len(expected_output):
+                for exp in expected_output:
+                    keyed.add(exp)
+                del expected_output[:]
+
+            key = key_fn(transaction)
+            item = keyed.pop(key, lambda exp: self._transform(exp, x_fn))
+            if item is None:
+                self.errors += 1
+                log.error(f"Received transaction with key '{key}' doesn't match any expected one")
+                log.info(f"Received: {repr(transaction)}")
+                if self._imm:
+                    TrxRecorder.flush_all()
+                assert not self._imm, "Received transaction which wasn't expected."
+                return
+            if self._compare_overridden:
+                match = self.compare(transaction, item[0], log, strict_type)
             else:
-                raise TypeError(f"Expected a callable compare function but got {str(type(x_fn))}")
+                match = self._compare(transaction, item[0], item[1], log, strict_type, compare_fn)
+            if match and recycle is not None:
+                self._recycle(recycle, monitor, transaction, item[0])
+
+        return check_received_transaction
+
+    @property
+    def _compare_overridden(self) -> bool:
+        """Subclass compare() is called for every trx then (per interface compare/transformation funcs aren't applied)"""
+        return type(self).compare is not Scoreboard.compare
 
     def compare(self, got: Any, exp: Any, log, strict_type=True):
         """Compare func.
             1. Optional apply transformation func to expected trx.
             2. Call either base or custom 'compare func' impl.
-            3. Store trx if don't match"""
+            3. Store trx if don't match
+            Scoreboard default compare/transformation funcs are used. Return True if trx match"""
+        expected_val, exp = self._transform(exp)
+        return self._compare(got, exp, expected_val, log, strict_type)
+
+    def _transform(self, exp: Any, x_fn=None) -> tuple:
+        """(expected value, expected trx): transformation func applied to expected trx (may be already started
+            in background). Scoreboard default func is used if 'x_fn' isn't given."""
+        if isinstance(exp, Prefetched):
+            return exp.result(), exp.trx
+        x_fn = x_fn if x_fn is not None else self.x_fn
+        return (x_fn(exp) if x_fn is not None else exp), exp
 
-        # Input transform
-        expected_val = self.x_fn(exp) if self.x_fn is not None else exp
-        log.debug(f"Compare {got} and {expected_val}")
+    @profiler.measure('compare')
+    def _compare(self, got: Any, exp: Any, expected_val: Any, log, strict_type=True, compare_fn=None):
+        """Compare received trx with transformed expected one. Return True if trx match."""
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"Compare {got} and {expected_val}")
 
         # Compare the types
         if strict_type and type(got) != type(expected_val):
@@ -58,20 +339,26 @@ class Scoreboard(CocoTBScoreboard):
             log.error("Received transaction type is different than expected")
             log.info(f"Received: {str(type(got))} but expected {str(type(expected_val))}")
             exp.store_to_file()
+            if self._imm:
+                TrxRecorder.flush_all()
             assert not self._imm, "Received transaction of wrong type. Set strict_type=False to avoid this."
-            return
+            return False
 
         # Compare trx content
-        match = self.compare_fn(got, expected_val)
+        compare_fn = compare_fn if compare_fn is not None else self.compare_fn
+        match = compare_fn(got, expected_val)
 
         if not match:
             self.errors += 1
-            log.error(f"Received value: '{repr(got)}' doesn't match expected one: '{repr(expected_val)}")
+            if getattr(compare_fn, 'diff', None) is not None:
+                log.error(compare_fn.diff(got, expected_val))
+            else:
+                log.error(f"Received value: '{repr(got)}' doesn't match expected one: '{repr(expected_val)}")
             exp.store_to_file()
+            if self._imm:
+                TrxRecorder.flush_all()
             assert not self._imm, "Received transaction don't match."
-
-        # don't use base compare func due to 'deprecated' warnings
-        # super().compare(got, expected_val, log, strict_type)
+        return match
 
     @property
     def result(self):
@@ -83,6 +370,8 @@ class Scoreboard(CocoTBScoreboard):
         """
         fail = False
         for monitor, expected_output in self.expected.items():
+            if monitor in self.keyed:
+                expected_output = list(self.keyed[monitor]) + list(expected_output)
             if callable(expected_output):
                 self.log.debug("Can't check all data returned for %s since "
                                "expected output is callable function rather "
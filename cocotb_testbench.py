@@ -1,15 +1,24 @@
 # CocoTB. Base TestBench class
 
 import logging
+import os
+import random
 from typing import Any, Callable
 
+import cocotb
 from cocotb.log import SimLog
+from cocotb.queue import Queue
+from cocotb.triggers import Combine
 from cocotb_coverage.coverage import coverage_section, coverage_db
 
 from cocotb_util.cocotb_agent import BusAgent
 from cocotb_util.cocotb_scoreboard import Scoreboard
 from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_trx_generator import TrxGenerator
 from cocotb_util.cocotb_coverage_processor import CoverProcessor
+from cocotb_util.cocotb_recorder import TrxRecorder
+from cocotb_util.cocotb_profiler import profiler
+from cocotb_util.cocotb_checkpoint import save_checkpoint, load_checkpoint, checkpoint_exists
 
 
 class TestBench(object):
@@ -23,10 +32,21 @@ class TestBench(object):
         self.log = SimLog("cocotb.testbench")
         self.log.setLevel(logging.INFO)
 
-        self.agent = agent
+        # trx files reset by this test only: previous test may have failed before close_all() at its end
+        TrxRecorder.close_all()
+
+        self.agent = agent  # default agent
+        self.agents = {}  # {name: agent} driven concurrently
+        self._agent_cfg = {}  # {name: (Trx, sequencer func)}
         self.scoreboard = scoreboard
-        self.runs = 0
-        self.max_runs = 1
+        self.runs = 0  # test cases run by all the agents
+        self.max_runs = 1  # per agent (see agent_stop())
+        self.agent_runs = {}  # {name: test cases run by agent}
+        self.checkpoint_fname = os.environ.get('COCOTB_CHECKPOINT', None)  # checkpoint to resume from and update
+        self.coverage_batch = False  # collect coverage of agents trx by batches in separate task (see run())
+        self._coverage_queue = None
+        if agent is not None:
+            self.add_agent(agent)
 
         # run optional initialization
         self.init()
@@ -39,14 +59,88 @@ class TestBench(object):
         """Init TestBench before test started. To be overridden if needed."""
         pass
 
+    def add_agent(
+            self,
+            agent: BusAgent,
+            Trx: type = Transaction,  # trx class generated for the agent
+            sequencer: Callable = None,  # func returning trx iterable. 'self.sequencer(Trx, <agent_stop()>)' by default
+            interface: dict = None):  # Scoreboard.add_interface() kwargs to check trx received by agent monitor
+        """Add named agent to be run concurrently with other ones (see run())"""
+        assert agent.name not in self.agents, f"Agent '{agent.name}' already added"
+        self.agents[agent.name] = agent
+        self._agent_cfg[agent.name] = (Trx, sequencer)
+        self.agent_runs[agent.name] = 0
+        if self.agent is None:
+            self.agent = agent
+        if interface is not None:
+            self.scoreboard.add_interface(agent.monitor, agent.monitor.expected, **interface)
+
     async def run(self):
-        """Run tests cases. To be overridden."""
-        for trx in self.sequencer(Transaction, self.stop):
-            if self.agent.monitor is not None:
-                self.agent.monitor.add_expected(trx)
-            if self.agent.driver is not None:
-                await self.agent.driver.send(trx)
-            self.coverage.collect(trx)
+        """Run tests cases. To be overridden.
+            Every agent is run by its own coroutine (see run_agent()). Coverage is collected by 'collect()' for every
+            trx driven. If 'coverage_batch' is set, trx are queued and collected by batches ('collect_batch()') in
+            separate task, so status reports, checkpoints and per trx callbacks are called by batches."""
+        coverage = getattr(self, 'coverage', None)
+        if coverage is not None and self.coverage_batch:
+            self._coverage_queue = Queue()
+            collector = cocotb.start_soon(self._collect_coverage())
+        await Combine(*[cocotb.start_soon(self.run_agent(name)) for name in self.agents])
+        if self._coverage_queue is not None:
+            self._coverage_queue.put_nowait(None)
+            await collector
+            self._coverage_queue = None
+
+    async def run_agent(self, name: str):
+        """Run test cases of one agent.
+            Pipelined driver (see BusDriver 'max_queue') drives trx while next ones are generated."""
+        agent = self.agents[name]
+        Trx, sequencer = self._agent_cfg[name]
+        driver = agent.driver
+        coverage = getattr(self, 'coverage', None)
+        if sequencer is None:
+            sequencer = lambda: self.sequencer(Trx, lambda: self.agent_stop(name))
+        for trx in sequencer():
+            if agent.monitor is not None:
+                await agent.monitor.wait_expected_space()
+                agent.monitor.add_expected(trx)
+            if driver is not None:
+                if driver.pipelined:
+                    await driver.put(trx)
+                else:
+                    await driver.send(trx)
+            if self._coverage_queue is not None:
+                self._coverage_queue.put_nowait((name, trx.snapshot() if hasattr(trx, 'snapshot') else trx))
+            elif coverage is not None:
+                coverage.collect(trx)
+            self.agent_runs[name] += 1
+        if driver is not None and driver.pipelined:
+            await driver.wait_idle()
+
+    async def _collect_coverage(self):
+        """Coverage consumer ('coverage_batch' mode)"""
+        while self._collect_queued([await self._coverage_queue.get()]):
+            pass
+
+    def _collect_queued(self, items: list = None) -> bool:
+        """Collect given and all queued trx by batches (per agent). Trx are collected one by one if coverage
+            processor overrides 'collect()'. Return False if end of queue is met."""
+        coverage = self.coverage
+        queue = self._coverage_queue
+        items = items or []
+        while not queue.empty():
+            items.append(queue.get_nowait())
+        batches = {}
+        for item in items:
+            if item is not None:
+                batches.setdefault(item[0], []).append(item[1])
+        per_trx = type(coverage).collect is not CoverProcessor.collect
+        for trxs in batches.values():
+            if per_trx:
+                for trx in trxs:
+                    coverage.collect(trx)
+            else:
+                coverage.collect_batch(trxs)
+        return None not in items
 
     def check(self):
         """Check run statistics after test finished. To be overridden if needed."""
@@ -57,21 +151,116 @@ class TestBench(object):
         self.log.debug('Check for testing is over')
         return self.runs >= self.max_runs
 
-    def sequencer(self, Trx: Transaction, stop: Callable = lambda: True, *args):
+    def agent_stop(self, name: str):
+        """Stop testing of agent when return True. To be overridden.
+            Agent runs 'max_runs' test cases by default. Overridden stop() is used for every agent."""
+        if type(self).stop is not TestBench.stop:
+            return self.stop()
+        return self.agent_runs[name] >= self.max_runs
+
+    def sequencer(
+            self,
+            Trx: Transaction,
+            stop: Callable = lambda: True,
+            *args,
+            batch_size: int = 0,  # randomize trx by batches of 'batch_size' (see TrxGenerator)
+            prefetch: int = 0):  # number of batches randomized ahead in a worker thread
         """Generate randomized Trx while goal not achieved"""
         trx = Trx(*args)
+        generator = TrxGenerator(trx, batch_size, prefetch) if batch_size else None
+        try:
+            while True:
+                if stop():
+                    self.log.info('Testing finished.')
+                    break
+                self.log.info(f'Test case # {self.runs}')
+                if generator is None:
+                    trx.randomize()
+                else:
+                    generator.randomize()
+                yield trx
+                self.runs += 1
+        finally:
+            if generator is not None:
+                generator.stop()
+
+    def coverage_sequencer(
+            self,
+            Trx: Transaction,
+            stop: Callable = lambda: False,
+            *args,
+            goal: float = 100.0,  # coverage goal (%) for every cover item
+            bias: float = 0.9,  # probability to direct trx to uncovered bin
+            cover_items: list = None):  # cover items to be closed (coverage processor ones by default)
+        """Generate Trx directed to uncovered bins while coverage goal not achieved.
+            Target item is one with the lowest coverage among directable ones (trx 'field' of CoverPoint is known).
+            Bins which can't be hit (constraints not resolved) are marked unreachable: they are not targeted
+            any more and don't count towards the goal."""
+        trx = Trx(*args)
+        cover_items = self.coverage._cover_items if cover_items is None else cover_items
+        directable = [item for item in cover_items if getattr(item, 'directable', False)]
         while True:
-            if stop():
+            if self._coverage_queue is not None:
+                self._collect_queued()  # coverage of trx generated so far is needed to direct next one
+            if stop() or all(self._goal_percentage(item) >= goal for item in cover_items):
                 self.log.info('Testing finished.')
                 break
             self.log.info(f'Test case # {self.runs}')
-            trx.randomize()
+            target = None
+            if directable and random.random() < bias:
+                for item in sorted(directable, key=self._goal_percentage):
+                    bin = item.pick_uncovered()
+                    if bin is not None:
+                        target = (item, bin)
+                        break
+            if target is None:
+                trx.randomize()
+            elif not trx.randomize_to(target[0].bin_target(target[1])):
+                self.log.debug(f'Unreachable bin: {target[0]._name}: {target[1]}')
+                target[0].mark_unreachable(target[1])
             yield trx
             self.runs += 1
 
+    @staticmethod
+    def _goal_percentage(item) -> float:
+        """Coverage (%) of cover item compared to goal: unreachable bins are discounted"""
+        return getattr(item, 'reachable_percentage', item.cover_percentage)
+
+    def checkpoint(self):
+        """Store coverage, RNG states and run counters to resume from at next run"""
+        coverage = getattr(self, 'coverage', None)
+        save_checkpoint(self.checkpoint_fname, counters={
+            'runs': self.runs,
+            'agent_runs': dict(self.agent_runs),
+            'trx_cnt': coverage._trx_cnt if coverage is not None else 0})
+
+    def resume(self):
+        """Restore coverage, RNG states and run counters from checkpoint"""
+        counters = load_checkpoint(self.checkpoint_fname)['counters']
+        self.runs = counters.get('runs', 0)
+        self.agent_runs.update(counters.get('agent_runs', {}))
+        coverage = getattr(self, 'coverage', None)
+        if coverage is not None:
+            coverage._trx_cnt = counters.get('trx_cnt', 0)
+
     async def run_tb(self):
-        """Run test cases."""
+        """Run test cases.
+            When 'COCOTB_CHECKPOINT' file is set: resume from it if exists, update it periodically (at coverage
+            'checkpoint' rate, see CoverProcessor), at timeout and at the end."""
+        profiler.reset()  # profile of this test only
+        if self.checkpoint_fname is not None:
+            if checkpoint_exists(self.checkpoint_fname):
+                self.resume()
+            self.coverage.checkpoint_fn = self.checkpoint
         await self.run()
+        for agent in self.agents.values():
+            if agent.monitor is not None:
+                agent.monitor.flush_samples()
         self.log.info(f'Finish tests. {self.runs} transactions were run.')
         self.coverage.final_report()
+        profiler.summary(self.log.info)
+        if self.checkpoint_fname is not None:
+            self.checkpoint()
+        TrxRecorder.close_all()
+        self.scoreboard.shutdown()
         raise self.scoreboard.result
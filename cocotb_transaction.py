@@ -1,8 +1,10 @@
 # CocoTB. Base Transaction class
 
 import logging
+import inspect
+import operator
 from typing import Iterable
-import json
+import copy
 import os
 import os.path as osp
 
@@ -10,58 +12,147 @@ from cocotb_coverage.crv import Randomized
 from cocotb.log import SimLog
 
 from cocotb_util import cocotb_util
+from cocotb_util.cocotb_recorder import TrxRecorder
+from cocotb_util.cocotb_profiler import profiler
+
+
+class FieldsConstraint(object):
+    """Constraint func of several trx fields: every field value should satisfy its predicate.
+        'base' - constraint of the same random fields which is combined with (rather than overridden by) this one."""
+
+    def __init__(self, predicates: dict, base=None):
+        self._predicates = predicates
+        self._base = base
+        self._base_args = list(inspect.signature(base).parameters) if base is not None else []
+        self._args = sorted(set(predicates) | set(self._base_args))  # constraint args should be in alphabetical order
+        self.__signature__ = inspect.Signature(
+            [inspect.Parameter(arg, inspect.Parameter.POSITIONAL_OR_KEYWORD) for arg in self._args])
+
+    def __call__(self, *values):
+        values = dict(zip(self._args, values))
+        if not all(predicate(values[field]) for field, predicate in self._predicates.items()):
+            return False
+        return self._base is None or self._base(*[values[arg] for arg in self._base_args])
+
+
+def _items_getter(items: tuple):
+    """Func returning tuple of trx items values"""
+    if len(items) == 1:
+        getter = operator.attrgetter(items[0])
+        return lambda trx: (getter(trx),)
+    return operator.attrgetter(*items)
 
 
 class Transaction(Randomized):
+    """Base transaction. Items are either given at init or declared once by '__slots__' of final class, e.g.
+        >>> class BusTrx(Transaction):
+        >>>     __slots__ = ('addr', 'data')
+        Slots declare items once (to_dict() uses per-class getter), they don't save memory: Randomized instances
+        keep '__dict__' for constraints state. Use TrxPool to avoid allocating trx per sample."""
+
+    log = SimLog("cocotb.testbench.trx")  # shared by all trx
+    log.setLevel(logging.INFO)
+    _items = ()
+    _items_getter = staticmethod(lambda trx: ())
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        slots = []
+        for klass in reversed(cls.__mro__):
+            klass_slots = klass.__dict__.get('__slots__', ())
+            slots.extend((klass_slots,) if isinstance(klass_slots, str) else klass_slots)
+        slots = tuple(slot for slot in dict.fromkeys(slots) if slot not in ('__dict__', '__weakref__'))
+        if slots:
+            cls._items = slots
+            cls._items_getter = staticmethod(_items_getter(slots))
 
     def __init__(
             self,
-            items: Iterable = [],
+            items: Iterable = [],  # trx items (items declared by '__slots__' are used if empty)
             store_trx: bool = False,  # flag to store trx to file ('errornous' or 'on request')
             store_trx_fname: str = 'store_trx.txt',  # file name to store trx
-            reset_store_trx_file: bool = True):  # flag to remove trx stored at previous run
+            reset_store_trx_file: bool = True,  # flag to remove trx stored at previous run
+            store_trx_fmt: str = 'json'):  # stored trx format: 'json' lines or 'bin' (length-prefixed)
         super().__init__()
-        self.log = SimLog("cocotb.testbench.trx")
-        # self.log.addHandler(logging.StreamHandler())
-        self.log.setLevel(logging.INFO)
 
-        self._items = items
+        if items:
+            self._items = tuple(items)
+            self._items_getter = _items_getter(self._items)
         for item in self._items:
             setattr(self, item, None)
 
         self._load_from_file_gen = None
+        self._trx_index = {}  # {fname: (file size, trx offsets)}
 
         self.store_trx = store_trx
-        self.store_trx_fname = store_trx_fname
+        self.store_trx_fname = osp.join(os.environ.get('COCOTB_RUN_DIR', ''), store_trx_fname)  # see cocotb_regression
+        self.store_trx_fmt = store_trx_fmt
         if reset_store_trx_file:
-            if osp.isfile(self.store_trx_fname):
-                os.remove(self.store_trx_fname)
+            TrxRecorder.reset_file(self.store_trx_fname, once=True)
 
     def __repr__(self):
         """Transaction object items string representation"""
-        foo = {item: getattr(self, item, None) for item in self._items}
-        return f'{foo}'
+        return f'{self.to_dict()}'
+
+    def to_dict(self) -> dict:
+        """Transaction items dict"""
+        return dict(zip(self._items, self._items_getter(self)))
 
+    def from_dict(self, trx: dict):
+        """Overwrite transaction items using dict"""
+        for item in trx:
+            setattr(self, item, trx[item])
+
+    def snapshot(self, pool=None):
+        """Cheap copy of transaction to be stored while original one is re-randomized.
+            Constraints and other attributes are shared with original transaction.
+            'pool' - TrxPool to take recycled trx from instead of allocating new one."""
+        return copy.copy(self) if pool is None else pool.snapshot(self)
+
+    def copy_from(self, trx):
+        """Overwrite all the attributes (shallow copy) by ones of other trx of the same class"""
+        self.__dict__.update(trx.__dict__)
+        for item, val in zip(trx._items, trx._items_getter(trx)):
+            setattr(self, item, val)
+
+    @profiler.measure('randomize')
     def randomize(self):
         super().randomize()
 
+    def randomize_to(self, target: dict) -> bool:
+        """Randomize trx directing fields to target values. 'target' - {field: (predicate(value), value generator or None)}.
+            Random fields are constrained by predicates, rest of fields are set by generators after randomization.
+            Return False (trx is randomized without target) if constraints can't be resolved."""
+        predicates = {field: target[field][0] for field in target if field in self._randVariables}
+        if len(predicates) == 1:
+            base = self._simpleConstraints.get(next(iter(predicates)), None)
+        else:
+            base = self._implConstraints.get(tuple(sorted(predicates)), None)
+        try:
+            if predicates:
+                self.randomize_with(FieldsConstraint(predicates, base))
+            else:
+                self.randomize()
+        except Exception:
+            self.randomize()
+            return False
+        for field, (_, generator) in target.items():
+            if field not in self._randVariables and generator is not None:
+                setattr(self, field, generator())
+        return True
+
     def post_randomize(self):
         """To be overridden"""
         self.log.debug('Not implemented')
         # self.load_from_file()
 
     def load_from_file(self, fname=None):
-        """Load trx content from file"""
+        """Load trx content from file. Stored trx (in 'store_trx_fmt' format) are read lazily one by one."""
         fname = self.store_trx_fname if fname is None else fname
 
-        def load_from_file_gen():
-            with open(fname, 'r') as fid:
-                for trx_str in fid.readlines():
-                    yield json.loads(trx_str)
-
         # create 'trx from file' generator
         if self._load_from_file_gen is None:
-            self._load_from_file_gen = load_from_file_gen()
+            self._load_from_file_gen = self._load_from_file_gen_create(fname)
 
         # overwrite trx using 'data from file'
         try:
@@ -69,19 +160,98 @@ class Transaction(Randomized):
         except StopIteration:
             self.log.warning(f'Trx from file are over')
         else:
-            for item in trx:
-                setattr(self, item, trx[item])
+            self.from_dict(trx)
             self.log.info(f'Trx content was overwritten from file: {repr(self)}')
 
+    def seek_trx(self, n: int, fname=None):
+        """Move 'load_from_file' position to stored trx #n without parsing previous ones"""
+        fname = self.store_trx_fname if fname is None else fname
+        offsets = self.index_file(fname)
+        offset = offsets[n] if n < len(offsets) else osp.getsize(fname)
+        self._load_from_file_gen = self._load_from_file_gen_create(fname, int(offset))
+
+    def replay_from_file(self, start: int = 0, stop: int = None, fname=None):
+        """Trx generator. Overwrite trx content using stored trx [start, stop) and yield it."""
+        fname = self.store_trx_fname if fname is None else fname
+        offsets = self.index_file(fname)
+        stop = len(offsets) if stop is None else min(stop, len(offsets))
+        if start >= stop:
+            return
+        for n, trx in enumerate(self._load_from_file_gen_create(fname, int(offsets[start])), start):
+            if n >= stop:
+                break
+            self.from_dict(trx)
+            yield self
+
+    def num_stored_trx(self, fname=None) -> int:
+        """Number of trx stored to file"""
+        fname = self.store_trx_fname if fname is None else fname
+        return len(self.index_file(fname))
+
+    def index_file(self, fname=None, chunk_size: int = 1 << 24):
+        """Build (or get cached) index of stored trx start offsets (see TrxRecorder.index()).
+            Index is rebuilt when file size changed."""
+        fname = self.store_trx_fname if fname is None else fname
+        TrxRecorder.flush_file(fname)
+        size = osp.getsize(fname)
+        cached = self._trx_index.get(fname, None)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        offsets = TrxRecorder.index(fname, self.store_trx_fmt, chunk_size)
+        self._trx_index[fname] = (size, offsets)
+        return offsets
+
+    def _load_from_file_gen_create(self, fname, offset: int = 0):
+        """Create generator reading stored trx lazily starting from 'offset' """
+        return TrxRecorder.read(fname, self.store_trx_fmt, offset)
+
     def store_to_file(self, store_trx=None, fname=None):
-        """Store trx item to file. """
+        """Store trx item to file. File is kept opened and written through buffer (see TrxRecorder)."""
         store_trx = self.store_trx if store_trx is None else store_trx
         if store_trx:
-            trx = {item: getattr(self, item, None) for item in self._items}
             fname = self.store_trx_fname if fname is None else fname
-            with open(fname, 'a') as fid:
-                trx_str = json.dumps(trx)
-                fid.write(f"{trx_str}\n")
+            TrxRecorder.get(fname, self.store_trx_fmt).write(self.to_dict())
+
+
+class TrxPool(object):
+    """Free lists of trx (per trx class) to recycle trx instead of allocating new one per bus beat.
+        Trx is returned to the pool by release() when it's not used any more (e.g. by scoreboard after match)."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size  # max number of free trx per class
+        self._free = {}  # {trx class: [free trx]}
+
+    def __len__(self):
+        return sum(len(free) for free in self._free.values())
+
+    def acquire(self, Trx: type, *args, **kwargs):
+        """Get recycled trx of 'Trx' class (with values of previous use) or create new one"""
+        free = self._free.get(Trx, None)
+        if free:
+            return free.pop()
+        return Trx(*args, **kwargs)
+
+    def release(self, trx):
+        """Return trx to the pool"""
+        free = self._free.setdefault(type(trx), [])
+        if len(free) < self.max_size:
+            free.append(trx)
+
+    def snapshot(self, trx):
+        """Copy of trx using recycled one if any"""
+        free = self._free.get(type(trx), None)
+        if not free:
+            return copy.copy(trx)
+        snapshot = free.pop()
+        snapshot.copy_from(trx)
+        return snapshot
+
+    def clear(self):
+        self._free.clear()
+
+
+# global trx pool
+trx_pool = TrxPool()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+# CocoTB. Batch generator of randomized transactions
+
+import inspect
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+import constraint
+
+from cocotb.log import SimLog
+from cocotb_coverage.crv import Randomized
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_profiler import profiler
+
+
+class TrxGenerator(object):
+    """Randomize trx by batches instead of resolving constraints for every trx.
+        1. Constraints are resolved once: feasible solutions of jointly constrained fields and filtered domains
+           of independent fields are cached (re-resolved when trx constraints/domains are changed)
+        2. Field values for 'batch_size' trx are drawn at once by numpy RNG. RNG is seeded from global numpy RNG
+           (see init_random_seed()), so generated sequence is reproducible with 'RANDOM_SEED'
+        3. 'prefetch' - number of batches drawn ahead in a worker thread
+        Applicable to static constraints only: no solve order, no 'pre_randomize'/'randomize' override and
+        constraints depend on random fields only. Otherwise trx.randomize() is called for every trx."""
+
+    def __init__(self, trx: Transaction, batch_size: int = 1024, prefetch: int = 0):
+        self.log = SimLog("cocotb.testbench.trx_generator")
+        self.log.setLevel(logging.INFO)
+
+        self.trx = trx
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self.rng = numpy.random.default_rng(numpy.random.randint(2 ** 31))
+        self.static = self._is_static()
+        self._key = None
+        self._joint = None  # (field names, solutions table, probabilities)
+        self._independent = None  # {field name: (values, probabilities)}
+        self._batch = {}  # {field name: values list}
+        self._batch_len = 0
+        self._pos = 0
+        self._executor = None
+        self._pending = deque()
+        if not self.static:
+            self.log.info(f'{type(trx).__name__} constraints are not static. Trx are randomized one by one.')
+
+    def randomize(self):
+        """Randomize trx using next values of the batch ('Transaction.randomize()' if constraints are not static)"""
+        if self._constraints_key() != self._key:
+            self._next_batch()  # constraints are changed: rest of the batch is dropped
+        if not (self.static and self._randomize_from_batch()):
+            self.trx.randomize()  # measured by Transaction.randomize() itself
+
+    @profiler.measure('randomize')
+    def _randomize_from_batch(self) -> bool:
+        """Set trx fields to next values of the batch. False if constraints are not static any more."""
+        if self._pos >= self._batch_len:
+            self._next_batch()
+            if not self.static:
+                return False
+        for field, values in self._batch.items():
+            setattr(self.trx, field, values[self._pos])
+        self._pos += 1
+        self.trx.post_randomize()
+        return True
+
+    def stop(self):
+        """Stop prefetch worker"""
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _is_static(self) -> bool:
+        trx = self.trx
+        if trx._solve_order:
+            return False
+        if type(trx).pre_randomize is not Randomized.pre_randomize or \
+                type(trx).randomize not in (Transaction.randomize, Randomized.randomize):
+            return False
+        for cstr in itertools.chain(trx._simpleConstraints.values(), trx._implConstraints.values(),
+                                    trx._simpleDistributions.values(), trx._implDistributions.values()):
+            if any(arg not in trx._randVariables for arg in inspect.signature(cstr).parameters):
+                return False
+        return True
+
+    def _constraints_key(self) -> tuple:
+        """Identity of current constraints and domains to detect changes"""
+        trx = self.trx
+        return tuple(tuple((key, id(val)) for key, val in cstr.items()) for cstr in (
+            trx._randVariables, trx._simpleConstraints, trx._implConstraints,
+            trx._simpleDistributions, trx._implDistributions))
+
+    def _next_batch(self):
+        key = self._constraints_key()
+        if key != self._key:
+            self.stop()
+            self._key = key
+            self.static = self._is_static()
+            if not self.static:
+                self.log.info(f'{type(self.trx).__name__} constraints are not static any more.')
+                return
+            self._resolve()
+        if self.prefetch:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1)  # single worker keeps RNG sequence order
+            while len(self._pending) <= self.prefetch:
+                self._pending.append(self._executor.submit(self._draw, self.batch_size))
+            self._batch = self._pending.popleft().result()
+        else:
+            self._batch = self._draw(self.batch_size)
+        self._batch_len = self.batch_size
+        self._pos = 0
+
+    def _resolve(self):
+        """Resolve constraints and cache solutions space"""
+        trx = self.trx
+        domains = {}
+        for field, domain in trx._randVariables.items():
+            cstr = trx._simpleConstraints.get(field, None)
+            domains[field] = [val for val in domain if cstr is None or cstr(val)]
+            if not domains[field]:
+                raise Exception("Could not resolve constraints!")
+
+        # jointly randomized fields: implicitly constrained ones and ones with implicit distributions
+        constrained = list(dict.fromkeys(itertools.chain.from_iterable(trx._implConstraints)))
+        joint = constrained + [field for field in dict.fromkeys(itertools.chain.from_iterable(trx._implDistributions))
+                               if field not in constrained]
+        solutions = [{}]
+        if constrained:
+            problem = constraint.Problem()
+            for field in constrained:
+                problem.addVariable(field, domains[field])
+            for fields, cstr in trx._implConstraints.items():
+                problem.addConstraint(cstr, fields)
+            solutions = problem.getSolutions()
+            if not solutions:
+                raise Exception("Could not resolve implicit constraints!")
+        unconstrained = joint[len(constrained):]
+        rows = [[sol[field] for field in constrained] + list(vals)
+                for sol in solutions for vals in itertools.product(*[domains[field] for field in unconstrained])]
+        distributions = list(trx._implDistributions.items()) + \
+            [((field,), dstr) for field, dstr in trx._simpleDistributions.items() if field in joint]
+        weights = None
+        if distributions:
+            pos = {field: n for n, field in enumerate(joint)}
+            weights = [numpy.prod([dstr(*[row[pos[field]] for field in fields]) for fields, dstr in distributions])
+                       for row in rows]
+        self._joint = (joint, *self._table(rows, weights)) if joint else None
+
+        self._independent = {}
+        for field in trx._randVariables:
+            if field not in joint:
+                dstr = trx._simpleDistributions.get(field, None)
+                weights = None if dstr is None else [dstr(val) for val in domains[field]]
+                self._independent[field] = self._table(domains[field], weights)
+        self.log.debug(f'Constraints resolved: {len(rows) if joint else 0} joint solutions')
+
+    @staticmethod
+    def _table(values: list, weights: list = None) -> tuple:
+        """Values object array (zero weighted ones are dropped) and their probabilities"""
+        if weights is not None:
+            values = [val for val, weight in zip(values, weights) if weight > 0]
+            weights = numpy.array([weight for weight in weights if weight > 0], dtype=float)
+            if not len(values):
+                raise Exception("Could not resolve constraints!")
+            weights /= weights.sum()
+        table = numpy.empty(len(values), dtype=object)
+        for n, val in enumerate(values):
+            table[n] = val
+        return table, weights
+
+    def _draw(self, n: int) -> dict:
+        """Draw field values for 'n' trx: {field name: values list}"""
+        batch = {}
+        if self._joint is not None:
+            fields, rows, p = self._joint
+            picked = rows[self.rng.choice(len(rows), size=n, p=p)]
+            for col, field in enumerate(fields):
+                batch[field] = [row[col] for row in picked]
+        for field, (values, p) in self._independent.items():
+            batch[field] = values[self.rng.choice(len(values), size=n, p=p)].tolist()
+        return batch
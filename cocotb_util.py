@@ -10,6 +10,10 @@ from cocotb.triggers import Timer
 from cocotb.handle import SimHandleBase
 from cocotb.result import TestSuccess
 
+from cocotb_util.cocotb_probe import probe_manager
+from cocotb_util.cocotb_recorder import TrxRecorder
+from cocotb_util.cocotb_profiler import profiler
+
 # from cocotb_util.cocotb_testbench import TestBench
 
 log = logging.getLogger(__name__)
@@ -70,6 +74,11 @@ def timeout(func):
                         # report final coverage after termination if use with TestBench() member
                         if len(args) > 0 and getattr(args[0], 'report_coverage_final', None) is not None:
                             args[0].report_coverage_final()
+                        # store checkpoint to resume from at next run
+                        if len(args) > 0 and getattr(args[0], 'checkpoint_fn', None) is not None:
+                            args[0].checkpoint_fn()
+                        profiler.summary()
+                        TrxRecorder.close_all()
                         raise TestSuccess
         return func(*args, **kwargs)
     return inner
@@ -90,20 +99,23 @@ async def reset(reset_n, duration_ns):
     reset_n._log.debug("Reset complete")
 
 
+@static_vars(capacity={})
 def assign_probe_str(probe: SimHandleBase, msg: str):
-    """Assign string msg to packed logic/bit vector. Use for debug to display python string msg in waveforms"""
-    if not isinstance(probe, SimHandleBase):
+    """Assign string msg to packed logic/bit vector. Use for debug to display python string msg in waveforms.
+        Whole msg is packed into single int (first char at MSB side) and written by one assignment.
+        Probe byte capacity is calculated once per handle and cached.
+        Write is done through 'probe_manager': dropped if value wasn't changed, deferred till timestep end."""
+    if not probe_manager.enabled or not isinstance(probe, SimHandleBase):
         return
-    msg = str.encode(msg)  # to byte arr
-    n = min(len(msg), int(len(probe) / 8))  # min between msg length and buffer size
-    probe.setimmediatevalue(0)  # cleanup
-    for i in range(n):
-        for j in range(8):
-            probe[8 * (n - 1 - i) + j].value = (msg[i] >> j) & 1
+    capacity = assign_probe_str.capacity.get(probe, None)
+    if capacity is None:
+        capacity = assign_probe_str.capacity[probe] = int(len(probe) / 8)
+    msg = str.encode(msg)[:capacity]  # to byte arr truncated by buffer size
+    probe_manager.write(probe, int.from_bytes(msg, 'big'))
 
 
 def assign_probe_int(probe: SimHandleBase, val: int):
     """Assign int val to int var. Use for debug to display python int in waveforms"""
-    if not isinstance(probe, SimHandleBase):
+    if not probe_manager.enabled or not isinstance(probe, SimHandleBase):
         return
-    probe.value = val
+    probe_manager.write(probe, val)
@@ -0,0 +1,42 @@
+# CocoTB. Test setup: import repo as 'cocotb_util' package (it's used as a submodule of that name)
+
+import importlib
+import importlib.util
+import os
+import os.path as osp
+import re
+import sys
+import types
+
+import pytest
+
+ROOT = osp.dirname(osp.dirname(osp.abspath(__file__)))
+# repo modules are imported through the package only ('cocotb_coverage.py' would shadow installed cocotb_coverage)
+sys.path[:] = [path for path in sys.path if osp.abspath(path or '.') != ROOT]
+
+os.environ.setdefault('COCOTB_PROFILE', '1')  # profiler stages are checked by tests
+
+if 'cocotb_util' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('cocotb_util', osp.join(ROOT, '__init__.py'),
+                                                  submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['cocotb_util'] = module
+    spec.loader.exec_module(module)
+
+# 'cocotb-coverage' checkout is expected next to cocotb_util. Use installed cocotb_coverage package if there is no one.
+try:
+    importlib.import_module('cocotb-coverage.cocotb_coverage.coverage')
+except ImportError:
+    import cocotb_coverage
+    import cocotb_coverage.coverage
+    checkout = types.ModuleType('cocotb-coverage')
+    checkout.__path__ = []
+    sys.modules['cocotb-coverage'] = checkout
+    sys.modules['cocotb-coverage.cocotb_coverage'] = cocotb_coverage
+    sys.modules['cocotb-coverage.cocotb_coverage.coverage'] = cocotb_coverage.coverage
+
+
+@pytest.fixture
+def cov_name(request):
+    """Unique cover items name prefix: coverage_db is global"""
+    return 'test.' + re.sub(r'\W', '_', request.node.name)
@@ -0,0 +1,26 @@
+import pytest
+
+from cocotb_util.cocotb_benchmark import CASES, run_case, check_regressions
+
+
+@pytest.mark.parametrize('case', list(CASES))
+def test_case_runs(case):
+    result = run_case(case, {'trx': 200}, repeat=1)
+    assert result['case'] == case and result['trx'] == 200 and result['trx_per_sec'] > 0
+
+
+@pytest.mark.parametrize('params', [
+    {'batch': 16, 'reorder': 2},
+    {'match': 'keyed', 'reorder': 3, 'generator': True},
+    {'batch': 32, 'dense': True, 'generator': True}])
+def test_pipeline_modes(params):
+    """Pipeline checks every trx is matched by scoreboard"""
+    run_case('pipeline', dict(params, trx=300), repeat=1)
+
+
+def test_check_regressions():
+    baseline = [{'case': 'probe', 'params': {'trx': 10}, 'trx_per_sec': 100.0, 'peak_rss_kb': 1000}]
+    results = [{'case': 'probe', 'params': {'trx': 10}, 'trx_per_sec': 70.0, 'peak_rss_kb': 1100}]
+    regressions = check_regressions(results, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and '70.0 trx/s' in regressions[0]
+    assert check_regressions(results, baseline, tolerance=0.5) == []
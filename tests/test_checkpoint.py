@@ -0,0 +1,56 @@
+import random
+
+import numpy
+
+from cocotb_util.cocotb_coverage import CoverPoint, CoverCross
+from cocotb_util.cocotb_checkpoint import save_checkpoint, load_checkpoint, checkpoint_exists
+from cocotb_util import cocotb_testbench
+
+from test_coverage import BusTrx, ItemsCoverage
+
+
+def make_coverage(cov_name, **kwargs):
+    addr = CoverPoint(f'{cov_name}.addr', field='addr', xf=lambda trx: trx.addr, bins=[0, 1, 2],
+                      bins_labels=['a0', 'a1', 'a2'])
+    data = CoverPoint(f'{cov_name}.data', field='data', xf=lambda trx: trx.data, ranges=[(0, 9), (10, 19)])
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.addr', f'{cov_name}.data'], **kwargs)
+    return ItemsCoverage([addr, data, cross]), addr, data, cross
+
+
+def test_save_and_restore(cov_name, tmp_path):
+    fname = str(tmp_path / 'checkpoint.pkl')
+    coverage, addr, data, cross = make_coverage(cov_name, dense=True)
+    coverage.collect_batch([BusTrx(0, 5), BusTrx(1, 15), BusTrx(1, 15)])
+    expected = {name: dict(item.detailed_coverage) for name, item in (('addr', addr), ('data', data), ('cross', cross))}
+    save_checkpoint(fname, counters={'runs': 3})
+    rand = random.random(), numpy.random.rand()
+    assert checkpoint_exists(fname) and not checkpoint_exists(None)
+    state = load_checkpoint(fname)  # checkpoint hits are added to current ones
+    assert state['counters'] == {'runs': 3}
+    assert (random.random(), numpy.random.rand()) == rand
+    for name, item in (('addr', addr), ('data', data), ('cross', cross)):
+        assert dict(item.detailed_coverage) == {key: 2 * hits for key, hits in expected[name].items()}
+    assert addr.covered_bins == {'a0': 0, 'a1': 0}
+    assert len(list(cross.uncovered_bins)) == 4
+
+
+def test_testbench_resume(cov_name, tmp_path, monkeypatch):
+    monkeypatch.setenv('COCOTB_CHECKPOINT', str(tmp_path / 'checkpoint.pkl'))
+    tb = cocotb_testbench.TestBench()
+    tb.coverage, *_ = make_coverage(cov_name)
+    tb.coverage.collect_batch([BusTrx(0, 5)])
+    tb.runs = 7
+    tb.checkpoint()
+    resumed = cocotb_testbench.TestBench()
+    resumed.coverage = tb.coverage
+    resumed.resume()
+    assert resumed.runs == 7 and resumed.coverage._trx_cnt == 1
+
+
+def test_checkpoint_rate(cov_name):
+    coverage = ItemsCoverage([CoverPoint(f'{cov_name}.data', field='data', bins=[0])], checkpoint={'trx': 4})
+    checkpoints = []
+    coverage.checkpoint_fn = lambda: checkpoints.append(coverage._trx_cnt)
+    for n in (3, 3, 3):
+        coverage.collect_batch(columns={'data': numpy.zeros(n)})
+    assert checkpoints == [6, 9]
@@ -0,0 +1,209 @@
+import numpy
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_coverage import CoverPoint, CoverCross, HitsTracker, coverage_db
+from cocotb_util.cocotb_coverage_processor import CoverProcessor, RateLimit
+
+
+def cross_size(cov_name, a_bins, b_bins, ign_bins, dense=False, a_kwargs=None):
+    CoverPoint(f'{cov_name}.a', xf=lambda trx: trx[0], **(a_kwargs or {'bins': a_bins}))
+    CoverPoint(f'{cov_name}.b', xf=lambda trx: trx[1], bins=b_bins)
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.a', f'{cov_name}.b'], ign_bins=ign_bins, dense=dense)
+    return cross.size
+
+
+@pytest.mark.parametrize('dense', [False, True])
+def test_ignore_scalar_bins(cov_name, dense):
+    assert cross_size(cov_name, [0, 1, 2], [0, 1], [(0, None), (1, 1)], dense) == 3
+
+
+@pytest.mark.parametrize('dense', [False, True])
+def test_ignore_tuple_bins(cov_name, dense):
+    """Tuple ignore bin component naming tuple cp bin is matched as the bin itself"""
+    assert cross_size(cov_name, [(0, 1), (2, 3), (4, 5)], [0, 1], [((0, 1), None), ((2, 3), 1)], dense) == 3
+
+
+@pytest.mark.parametrize('dense', [False, True])
+def test_ignore_range_bins(cov_name, dense):
+    size = cross_size(cov_name, None, [0, 1], [((0, 3), None), ((4, 7), 1)], dense,
+                      a_kwargs={'ranges': [(0, 3), (4, 7), (8, 9)]})
+    assert size == 3
+
+
+@pytest.mark.parametrize('dense', [False, True])
+def test_ignore_alternatives(cov_name, dense):
+    """List/tuple component which isn't a cp bin itself lists alternatives"""
+    assert cross_size(cov_name, [0, 1, 2], [0, 1], [([0, 2], 1), ((1, 5), 0)], dense) == 3
+
+
+def test_ignore_unknown_bin(cov_name):
+    assert cross_size(cov_name, [0, 1], [0, 1], [(7, None)]) == 4
+
+
+class BusTrx(Transaction):
+    __slots__ = ('addr', 'data')
+
+    def __init__(self, addr=None, data=None):
+        super().__init__(reset_store_trx_file=False)
+        self.addr, self.data = addr, data
+
+
+class ItemsCoverage(CoverProcessor):
+    def __init__(self, items, **report_cfg):
+        self.items = items
+        super().__init__(report_cfg={'status': {'trx': 1000}, 'final': {}, **report_cfg})
+
+    def define(self):
+        self.add_cover_items(*self.items)
+
+
+def sample_cross(cov_name, dense, trxs, batch):
+    addr = CoverPoint(f'{cov_name}.addr', field='addr', xf=lambda trx: trx.addr, bins=[0, 1, 2])
+    data = CoverPoint(f'{cov_name}.data', field='data', xf=lambda trx: trx.data, bins=[0, 1])
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.addr', f'{cov_name}.data'],
+                       ign_bins=[(2, 1)], dense=dense)
+    coverage = ItemsCoverage([addr, data, cross])
+    if batch:
+        coverage.collect_batch(trxs)
+    else:
+        for trx in trxs:
+            coverage.collect(trx)
+    return cross
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_dense_cross_matches_sparse(cov_name, batch):
+    trxs = [BusTrx(addr, data) for addr, data in ((0, 0), (0, 0), (1, 1), (2, 1), (2, 0), (5, 0))]
+    sparse = sample_cross(cov_name + '_sparse', False, trxs, batch)
+    dense = sample_cross(cov_name + '_dense', True, trxs, batch)
+    assert dict(dense.detailed_coverage) == dict(sparse.detailed_coverage) == \
+        {(0, 0): 2, (0, 1): 0, (1, 0): 0, (1, 1): 1, (2, 0): 1}
+    assert dense.size == sparse.size == 5
+    assert dense.coverage == sparse.coverage == 3
+    assert set(dense.uncovered_bins) == set(sparse.uncovered_bins) == {(0, 1), (1, 0)}
+    assert list(dense.covered_bins.values()) == list(sparse.covered_bins.values()) == [{2: 0}, {}]
+    # uncovered cross bins left per cp bin
+    assert list(dense.bin_cnt.values()) == list(sparse.bin_cnt.values()) == [{0: 1, 1: 1, 2: 0}, {0: 1, 1: 1}]
+
+
+def test_dense_cross_closure(cov_name):
+    cross = sample_cross(cov_name, True, [BusTrx(a, d) for a in range(3) for d in range(2)], batch=True)
+    assert cross.coverage == cross.size and not list(cross.uncovered_bins)
+    assert cross.closure(f'{cov_name}.data') == (2, 2)
+
+
+def test_dense_pick_uncovered(cov_name):
+    CoverPoint(f'{cov_name}.a', xf=lambda trx: trx[0], bins=list(range(32)))
+    CoverPoint(f'{cov_name}.b', xf=lambda trx: trx[1], bins=list(range(32)))
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.a', f'{cov_name}.b'], dense=True)
+    picks = {cross.pick_uncovered() for _ in range(200)}
+    assert any(a >= 16 for a, _ in picks)  # not biased to lowest index corner
+    for x_bin in cross.uncovered_bins:
+        if x_bin != (31, 31):
+            cross._hits[x_bin] += 1
+    assert list(cross.uncovered_bins) == [(31, 31)]
+    assert cross.pick_uncovered() == (31, 31)  # found by scan
+    cross.mark_unreachable((31, 31))
+    assert cross.pick_uncovered() is None
+
+
+def test_split_buckets():
+    assert CoverPoint.split_buckets(0, 99, 4) == [(0, 24), (25, 49), (50, 74), (75, 99)]
+    assert CoverPoint.split_buckets(0, 2, 5) == [(0, 0), (1, 1), (2, 2)]
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_range_bins(cov_name, batch):
+    cp = CoverPoint(f'{cov_name}.addr', field='addr', xf=lambda trx: trx.addr, ranges=[(10, 19), (0, 9), (30, 39)])
+    coverage = ItemsCoverage([cp])
+    trxs = [BusTrx(addr, 0) for addr in (0, 9, 10, 25, 39, 40)]
+    if batch:
+        coverage.collect_batch(trxs)
+    else:
+        for trx in trxs:
+            coverage.collect(trx)
+    assert cp.detailed_coverage == {(0, 9): 2, (10, 19): 1, (30, 39): 1}
+    assert set(cp.covered_bins) == {(0, 9), (10, 19), (30, 39)}
+
+
+def test_bucket_bins_labels(cov_name):
+    cp = CoverPoint(f'{cov_name}.data', field='data', buckets=(0, 255, 4), bins_labels=['q0', 'q1', 'q2', 'q3'])
+    ItemsCoverage([cp]).collect_batch(columns={'data': numpy.array([0, 63, 64, 255])})
+    assert cp.detailed_coverage == {'q0': 2, 'q1': 1, 'q2': 0, 'q3': 1}
+    assert cp.uncovered_bins == {'q2'}
+    assert cp.bin_target(cp.key_bin('q2'))['data'][1]() in range(128, 192)
+
+
+def test_overlapped_ranges(cov_name):
+    with pytest.raises(AssertionError):
+        CoverPoint(f'{cov_name}.addr', field='addr', ranges=[(0, 9), (5, 19)])
+
+
+def test_hits_tracker():
+    hits = HitsTracker({'a': 0, 'b': 1, 'c': 0}, at_least=2)
+    assert hits.uncovered == {'a', 'b', 'c'}
+    hits['b'] += 1
+    hits['a'] += 1
+    assert hits.uncovered == {'a', 'c'} and hits.take_closed() == ['b'] and hits.take_closed() == []
+    hits.pop('c')
+    assert hits.uncovered == {'a'}
+
+
+def test_closure_tracking(cov_name):
+    cp = CoverPoint(f'{cov_name}.addr', xf=lambda trx: trx.addr, bins=[0, 1, 2], at_least=2)
+    coverage = ItemsCoverage([cp])
+    for addr in (0, 1, 0, 1, 1):
+        coverage.collect(BusTrx(addr, 0))
+    assert cp.coverage == 2 and cp.cover_percentage == pytest.approx(200 / 3)
+    assert cp.uncovered_bins == {2}
+    assert cp.covered_bins == {0: 0, 1: 0}
+
+
+def test_status_report_rate(cov_name, monkeypatch):
+    coverage = ItemsCoverage([CoverPoint(f'{cov_name}.data', xf=lambda trx: trx.data, bins=[0])], status={'trx': 4})
+    reports = []
+    monkeypatch.setattr(coverage, 'status_report', lambda: reports.append(coverage._trx_cnt))
+    for _ in range(9):
+        coverage.collect(BusTrx(0, 0))
+    assert reports == [4, 8]
+
+
+def test_status_report_every_trx(cov_name, monkeypatch):
+    coverage = ItemsCoverage([CoverPoint(f'{cov_name}.data', xf=lambda trx: trx.data, bins=[0])], status={})
+    reports = []
+    monkeypatch.setattr(coverage, 'status_report', lambda: reports.append(coverage._trx_cnt))
+    for _ in range(3):
+        coverage.collect(BusTrx(0, 0))
+    assert reports == [1, 2, 3]
+
+
+def test_batch_vname(cov_name):
+    """'vname' sampled value is known to batch sampling before any single sample"""
+    cp = CoverPoint(f'{cov_name}.addr', vname='trx', bins=[0, 1, 2], rel=lambda trx, bin: trx.addr == bin)
+    ItemsCoverage([cp]).collect_batch([BusTrx(0, 0), BusTrx(2, 0), BusTrx(2, 0)])
+    assert cp.detailed_coverage == {0: 1, 1: 0, 2: 2}
+
+
+def test_batch_cross_of_other_processor_cp(cov_name):
+    """Cross over cover point sampled by another processor uses its latest hits"""
+    addr = CoverPoint(f'{cov_name}.addr', field='addr', bins=[0, 1])
+    data = CoverPoint(f'{cov_name}.data', field='data', bins=[0, 1])
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.addr', f'{cov_name}.data'])
+    ItemsCoverage([addr]).collect_batch([BusTrx(1, 0)])
+    ItemsCoverage([data, cross]).collect_batch([BusTrx(0, 0), BusTrx(0, 1), BusTrx(0, 1)])
+    assert cross.detailed_coverage == {(0, 0): 0, (0, 1): 0, (1, 0): 1, (1, 1): 2}
+
+
+def test_batch_status_report_rate(cov_name, monkeypatch):
+    coverage = ItemsCoverage([CoverPoint(f'{cov_name}.data', field='data', bins=[0])], status={'trx': 4})
+    reports = []
+    monkeypatch.setattr(coverage, 'status_report', lambda: reports.append(coverage._trx_cnt))
+    for n in (3, 3, 1, 1):
+        coverage.collect_batch(columns={'data': numpy.zeros(n)})
+    assert reports == [6, 8]
+
+
+def test_rate_limit_every_trx():
+    assert RateLimit().due(1) and RateLimit().due(5, 2)
+    assert not RateLimit(trx=10).due(5, 1)
@@ -0,0 +1,56 @@
+import numpy
+
+from cocotb_util.cocotb_coverage import CoverPoint, CoverCross
+from cocotb_util.cocotb_coverage_snapshot import CoverageSnapshot, SnapshotWriter, merge_snapshots
+
+from test_coverage import BusTrx, ItemsCoverage
+
+
+def make_coverage(cov_name, dense=False):
+    addr = CoverPoint(f'{cov_name}.addr', field='addr', bins=[0, 1, 2])
+    data = CoverPoint(f'{cov_name}.data', field='data', bins=[0, 1], bins_labels=['low', 'high'])
+    cross = CoverCross(f'{cov_name}.cross', items=[f'{cov_name}.addr', f'{cov_name}.data'], ign_bins=[(2, None)],
+                       dense=dense)
+    return ItemsCoverage([addr, data, cross]), [addr._name, data._name, cross._name]
+
+
+def test_save_and_load(cov_name, tmp_path):
+    coverage, names = make_coverage(cov_name, dense=True)
+    coverage.collect_batch([BusTrx(0, 0), BusTrx(1, 1), BusTrx(1, 1)])
+    fname = str(tmp_path / 'snapshot.npz')
+    CoverageSnapshot.from_db(names).save(fname)
+    snapshot = CoverageSnapshot.load(fname)
+    addr, data, cross = names
+    assert snapshot.coverage(addr) == (2, 3)
+    assert snapshot.covered_bins(data) == {'low': 0, 'high': 0}
+    assert snapshot.coverage(cross) == (2, 4)  # addr 2 cross bins are ignored
+    assert snapshot.bin_cnt(cross) == {addr: {0: 1, 1: 1}, data: {'low': 1, 'high': 1}}
+    assert snapshot.bin_cnt(addr) is None
+
+
+def test_delta_snapshots_merge(cov_name, tmp_path):
+    coverage, names = make_coverage(cov_name)
+    writer = SnapshotWriter(str(tmp_path / 'coverage'), delta=True)
+    files = []
+    for trxs in ([BusTrx(0, 0)], [], [BusTrx(1, 0), BusTrx(0, 0)]):
+        if trxs:
+            coverage.collect_batch(trxs)
+        files.append(writer.write())
+    merged = merge_snapshots(files)
+    full = CoverageSnapshot.from_db(names)
+    for name in names:
+        assert numpy.array_equal(merged.items[name]['hits'], full.items[name]['hits'])
+
+
+def test_merge_aligns_bins():
+    def point(bins, hits):
+        return {'meta': {'type': 'point', 'at_least': 1, 'weight': 1},
+                'tables': [numpy.array([repr(bin) for bin in bins], dtype=str)],
+                'hits': numpy.array(hits), 'valid': numpy.ones(len(bins), dtype=bool)}
+
+    merged = CoverageSnapshot()
+    merged.add('cp', point([0, 1], [1, 0]))
+    merged.add('cp', point([1, 2], [3, 0]))
+    assert merged.items['cp']['tables'][0].tolist() == ['0', '1', '2']
+    assert merged.items['cp']['hits'].tolist() == [1, 3, 0]
+    assert merged.coverage('cp') == (2, 3)
@@ -0,0 +1,70 @@
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_driver import BusDriver
+from cocotb_util.cocotb_mock import MockEntity, MockClock, mock_scheduler
+
+
+class Trx(Transaction):
+    __slots__ = ('valid', 'data')
+
+    def __init__(self, data=None):
+        super().__init__(reset_store_trx_file=False)
+        self.valid, self.data = 1, data
+
+
+@pytest.fixture
+def dut():
+    return MockEntity('dut', {'in_valid': 1, 'in_data': 8})
+
+
+def make_driver(dut, **kwargs):
+    with mock_scheduler():
+        return BusDriver(dut, signals=['valid', 'data'], name='in', clock=MockClock(), **kwargs)
+
+
+def send_queued(driver):
+    """Stand-in of driver thread: take queued trx and report it sent"""
+    trx, callback, _, _ = driver._sendQ.popleft()
+    callback(trx)
+    return trx
+
+
+def test_put_queues_snapshots(dut):
+    driver = make_driver(dut, max_queue=2)
+    assert driver.pipelined
+    trx = Trx(1)
+    put = driver.put(trx)
+    with pytest.raises(StopIteration):
+        put.send(None)
+    trx.data = 2  # trx is re-randomized while previous one is queued
+    with pytest.raises(StopIteration):
+        driver.put(trx).send(None)
+    put = driver.put(trx)
+    put.send(None)  # queue is full: waits for space
+    assert [queued.data for queued, *_ in driver._sendQ] == [1, 2]
+    assert send_queued(driver).data == 1
+    with pytest.raises(StopIteration):
+        put.send(None)
+    assert len(driver._sendQ) == 2
+
+
+def test_wait_idle(dut):
+    driver = make_driver(dut, max_queue=4)
+    with pytest.raises(StopIteration):
+        driver.put(Trx(1)).send(None)
+    wait = driver.wait_idle()
+    wait.send(None)  # trx is still queued
+    wait.close()
+    send_queued(driver)
+    with pytest.raises(StopIteration):
+        driver.wait_idle().send(None)
+
+
+def test_drive(dut):
+    driver = make_driver(dut)
+    assert not driver.pipelined
+    driver.drive(Trx(0x5a))
+    assert dut.in_data.value == 0x5a and dut.in_valid.value == 1
+    driver.drive(7)  # scalar burst item is driven to data signal
+    assert dut.in_data.value == 7
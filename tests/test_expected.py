@@ -0,0 +1,70 @@
+from concurrent.futures import Future
+
+from cocotb_util.cocotb_expected import ExpectedQueue, Prefetched
+from cocotb_util.cocotb_transaction import Transaction
+
+
+class Trx(Transaction):
+    __slots__ = ('addr', 'data')
+
+    def __init__(self, addr=None, data=None):
+        super().__init__(reset_store_trx_file=False)
+        self.addr, self.data = addr, data
+
+
+def test_fifo():
+    queue = ExpectedQueue()
+    for n in range(5):
+        queue.append(n)
+    assert len(queue) == 5 and queue[0] == 0 and queue[-1] == 4
+    assert queue.pop() == 0 and queue.pop(2) == 3
+    assert list(queue) == [1, 2, 4]
+    del queue[:]
+    assert len(queue) == 0
+
+
+def test_spill_keeps_order():
+    queue = ExpectedQueue(mem_capacity=4)
+    for n in range(20):
+        queue.append(Trx(n, n * 2) if n % 2 else n)
+    assert len(queue._mem) == 4 and len(queue) == 20
+    assert [trx if isinstance(trx, int) else trx.addr for trx in queue] == list(range(20))
+    assert queue[6] == 6  # loads spilled trx up to index
+    popped = [queue.pop() for _ in range(20)]
+    assert [trx if isinstance(trx, int) else trx.addr for trx in popped] == list(range(20))
+    assert all(trx.data == trx.addr * 2 for trx in popped if not isinstance(trx, int))
+    assert type(popped[1]) is Trx
+    assert len(queue) == 0
+
+
+def test_spill_prefetched_doesnt_wait():
+    queue = ExpectedQueue(mem_capacity=1)
+    done = Future()
+    done.set_result(10)
+    pending = [Future() for _ in range(2)]  # background jobs never finish
+    queue.append(Prefetched(Trx(0, 0), done))
+    queue.append(Prefetched(Trx(1, 1), done))
+    for n, future in enumerate(pending, 2):
+        queue.append(Prefetched(Trx(n, n), future, lambda trx: trx.addr * 10))
+    assert len(queue) == 4 and all(future.cancelled() for future in pending)
+    popped = [queue.pop() for _ in range(4)]
+    assert [exp.trx.addr for exp in popped] == [0, 1, 2, 3]
+    assert [exp.result() for exp in popped] == [10, 10, 20, 30]
+
+
+def test_append_after_drain_goes_to_memory():
+    queue = ExpectedQueue(mem_capacity=2)
+    for n in range(4):
+        queue.append(n)
+    queue.clear()
+    queue.append(10)
+    assert list(queue._mem) == [10] and len(queue) == 1
+
+
+def test_backpressure_space_event():
+    queue = ExpectedQueue(max_pending=2)
+    queue.append(0)
+    queue.append(1)
+    queue._space.clear()  # as wait_space() does when queue is full
+    queue.pop()
+    assert queue._space.is_set()
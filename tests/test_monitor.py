@@ -0,0 +1,58 @@
+import numpy
+import pytest
+
+from cocotb.binary import BinaryValue
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_monitor import BusMonitor
+from cocotb_util.cocotb_mock import MockEntity, MockClock, mock_scheduler
+
+
+class WideTrx(Transaction):
+    __slots__ = ('lo', 'hi')
+
+    def __init__(self):
+        super().__init__(reset_store_trx_file=False)
+
+
+def batch_monitor(signals, batch, **kwargs):
+    entity = MockEntity('dut', {f'out_{name}': width for name, width in signals.items()})
+    with mock_scheduler():
+        monitor = BusMonitor(entity, signals=list(signals), name='out', clock=MockClock(), sample_batch=batch,
+                             trx_cls=WideTrx, **kwargs)
+    received = []
+    monitor.add_batch_callback(lambda trxs, columns: received.append(columns))
+    return entity, monitor, received
+
+
+def test_sample_xz_as_zero():
+    entity, monitor, received = batch_monitor({'valid': 1, 'lo': 8}, batch=2)
+    entity.out_valid.value = 1
+    entity.out_lo._value = BinaryValue('1x0z0011')
+    monitor.sample()
+    entity.out_lo.value = 7
+    monitor.sample()
+    assert received[0]['lo'].tolist() == [0b10000011, 7]
+
+
+@pytest.mark.parametrize('vector', [False, True])
+def test_sample_wide_signals(vector):
+    if vector:
+        entity, monitor, received = batch_monitor({'vec': 100}, batch=2, sample_vector='vec',
+                                                  sample_fields={'lo': (0, 36), 'hi': (36, 64)})
+        values = [(1 << 99) | 5, (3 << 36) | 1]
+        handle = entity.out_vec
+    else:
+        entity, monitor, received = batch_monitor({'hi': 100, 'lo': 8}, batch=2)
+        values = [1 << 99, 3]
+        handle = entity.out_hi
+    for value in values:
+        handle.value = value
+        monitor.sample()
+    columns = received[0]
+    if vector:
+        assert columns['lo'].dtype == numpy.uint64 and columns['lo'].tolist() == [5, 1]
+        assert columns['hi'].tolist() == [1 << 63, 3]
+    else:
+        assert columns['hi'].tolist() == values
+        assert columns['lo'].dtype == numpy.uint64
@@ -0,0 +1,58 @@
+import cocotb
+
+from cocotb_util.cocotb_probe import ProbeManager
+from cocotb_util.cocotb_util import assign_probe_str
+from cocotb_util.cocotb_mock import MockHandle
+
+
+class FakeTask(object):
+    def __init__(self, coro):
+        coro.close()
+        self.killed = False
+
+    def done(self):
+        return self.killed
+
+
+def test_redundant_writes_dropped():
+    manager = ProbeManager(deferred=False)
+    probe = MockHandle('probe', 32)
+    manager.write(probe, 5)
+    probe.value = 0  # overwritten outside manager: same value isn't written again
+    manager.write(probe, 5)
+    assert probe.value == 0
+    manager.write(probe, 6)
+    assert probe.value == 6
+
+
+def test_deferred_flush(monkeypatch):
+    tasks = []
+    monkeypatch.setattr(cocotb, 'start_soon', lambda coro: tasks.append(FakeTask(coro)) or tasks[-1])
+    manager = ProbeManager()
+    probe = MockHandle('probe', 32)
+    manager.write(probe, 1)
+    manager.write(probe, 2)
+    assert len(tasks) == 1 and probe.value == 0
+    manager.flush()
+    assert probe.value == 2
+
+
+def test_flush_rescheduled_after_killed_task(monkeypatch):
+    tasks = []
+    monkeypatch.setattr(cocotb, 'start_soon', lambda coro: tasks.append(FakeTask(coro)) or tasks[-1])
+    manager = ProbeManager()
+    probe = MockHandle('probe', 32)
+    manager.write(probe, 1)
+    tasks[0].killed = True  # test ended before ReadWrite phase
+    manager.write(probe, 2)
+    assert len(tasks) == 2
+    manager.flush()
+    assert probe.value == 2
+
+
+def test_assign_probe_str_packs_msg(monkeypatch):
+    from cocotb_util import cocotb_util
+    monkeypatch.setattr(cocotb_util, 'probe_manager', ProbeManager(deferred=False))
+    probe = MockHandle('msg', 32)
+    assign_probe_str(probe, 'abcdef')  # truncated to 4 bytes, first char at MSB
+    assert probe.value == int.from_bytes(b'abcd', 'big')
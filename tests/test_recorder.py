@@ -0,0 +1,74 @@
+import os.path as osp
+
+import pytest
+
+from cocotb_util.cocotb_recorder import TrxRecorder
+from cocotb_util import cocotb_testbench
+
+TRX = [{'addr': n, 'data': [n] * (n % 3), 'name': f'trx{n}'} for n in range(10)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    yield lambda fmt: str(tmp_path / f'store_trx.{fmt}')
+    TrxRecorder.close_all()
+
+
+@pytest.mark.parametrize('fmt', ['json', 'bin'])
+def test_round_trip(store, fmt):
+    fname = store(fmt)
+    recorder = TrxRecorder.get(fname, fmt, buffer_size=16)
+    for trx in TRX:
+        recorder.write(trx)
+    assert list(TrxRecorder.read(fname, fmt)) == TRX  # pending buffer is flushed by read()
+
+
+@pytest.mark.parametrize('fmt', ['json', 'bin'])
+def test_index_and_read_from_offset(store, fmt):
+    fname = store(fmt)
+    recorder = TrxRecorder.get(fname, fmt)
+    for trx in TRX:
+        recorder.write(trx)
+    offsets = TrxRecorder.index(fname, fmt, chunk_size=7)
+    assert len(offsets) == len(TRX)
+    assert list(TrxRecorder.read(fname, fmt, int(offsets[4]))) == TRX[4:]
+
+
+def test_truncated_bin_trx_skipped(store):
+    fname = store('bin')
+    recorder = TrxRecorder.get(fname, 'bin')
+    for trx in TRX[:3]:
+        recorder.write(trx)
+    TrxRecorder.close_all()
+    with open(fname, 'r+b') as fid:
+        fid.truncate(osp.getsize(fname) - 2)
+    assert len(TrxRecorder.index(fname, 'bin')) == 2
+    assert list(TrxRecorder.read(fname, 'bin')) == TRX[:2]
+
+
+def test_reset_file_once(store):
+    fname = store('json')
+    TrxRecorder.get(fname).write(TRX[0])
+    TrxRecorder.reset_file(fname, once=True)
+    assert not osp.isfile(fname)
+    TrxRecorder.get(fname).write(TRX[0])
+    TrxRecorder.reset_file(fname, once=True)  # already reset during this test
+    assert list(TrxRecorder.read(fname)) == TRX[:1]
+
+
+def test_format_mismatch(store):
+    fname = store('json')
+    TrxRecorder.get(fname, 'json')
+    with pytest.raises(AssertionError):
+        TrxRecorder.get(fname, 'bin')
+
+
+def test_reset_file_at_next_test(store):
+    """Failed test doesn't reach close_all(): next TestBench still resets trx file once"""
+    fname = store('json')
+    TrxRecorder.reset_file(fname, once=True)
+    TrxRecorder.get(fname).write(TRX[0])
+    cocotb_testbench.TestBench()
+    TrxRecorder.reset_file(fname, once=True)
+    TrxRecorder.get(fname).write(TRX[1])
+    assert list(TrxRecorder.read(fname)) == TRX[1:2]
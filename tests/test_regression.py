@@ -0,0 +1,23 @@
+import os.path as osp
+import sys
+
+from cocotb_util.cocotb_regression import run_regression
+
+# stand-in of simulation: cocotb results file with failure for odd seeds and stored trx file
+SIM = '''
+import os
+seed = int(os.environ['RANDOM_SEED'])
+failure = '<failure/>' if seed % 2 else ''
+with open(os.environ['COCOTB_RESULTS_FILE'], 'w') as fid:
+    fid.write(f'<testsuites><testsuite><testcase name="t">{failure}</testcase></testsuite></testsuites>')
+with open(os.path.join(os.environ['COCOTB_RUN_DIR'], 'store_trx.txt'), 'w') as fid:
+    fid.write('{"seed": %d}\\n' % seed)
+'''
+
+
+def test_run_regression(tmp_path):
+    results = run_regression([sys.executable, '-c', SIM], range(4), outdir=str(tmp_path), workers=2)
+    assert [result['seed'] for result in results] == [0, 1, 2, 3]
+    assert [result['passed'] for result in results] == [True, False, True, False]
+    assert results[0]['failed_trx'] == []
+    assert results[1]['failed_trx'] == [osp.join(str(tmp_path), 'seed_1', 'store_trx.txt')]
@@ -0,0 +1,198 @@
+import logging
+from concurrent.futures import Future
+
+import numpy
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_monitor import BusMonitor
+from cocotb_util.cocotb_scoreboard import Scoreboard, BufferCompare, KeyedExpected
+from cocotb_util.cocotb_expected import Prefetched
+from cocotb_util.cocotb_mock import MockEntity, MockClock, mock_scheduler
+
+
+class Trx(Transaction):
+    __slots__ = ('addr', 'data')
+
+    def __init__(self, addr=None, data=None):
+        super().__init__(reset_store_trx_file=False)
+        self.addr, self.data = addr, data
+
+    def __eq__(self, other):
+        return type(other) is type(self) and self.to_dict() == other.to_dict()
+
+    __hash__ = Transaction.__hash__
+
+
+def make_monitor(name='out', **kwargs):
+    with mock_scheduler():
+        return BusMonitor(MockEntity('dut', {f'{name}_data': 8}), signals=['data'], name=name, clock=MockClock(),
+                          **kwargs)
+
+
+@pytest.fixture
+def monitor():
+    return make_monitor()
+
+
+@pytest.fixture
+def scoreboard():
+    return Scoreboard(MockEntity('dut', {}))
+
+
+def test_ordered_match(scoreboard, monitor):
+    scoreboard.add_interface(monitor, monitor.expected)
+    for n in range(3):
+        monitor.add_expected(Trx(n, n))
+    for n in range(3):
+        monitor._recv(Trx(n, n))
+    assert scoreboard.errors == 0 and not monitor.expected
+    scoreboard.result
+
+
+def test_mismatch(monitor):
+    scoreboard = Scoreboard(MockEntity('dut', {}), fail_immediately=False)
+    scoreboard.add_interface(monitor, monitor.expected)
+    monitor.add_expected(Trx(1, 1))
+    monitor._recv(Trx(1, 2))
+    assert scoreboard.errors == 1
+    with pytest.raises(AssertionError):
+        scoreboard.result
+
+
+def test_mismatch_fails_immediately(scoreboard, monitor):
+    scoreboard.add_interface(monitor, monitor.expected)
+    monitor.add_expected(Trx(1, 1))
+    with pytest.raises(AssertionError):
+        monitor._recv(Trx(1, 2))
+
+
+def test_reorder_depth(scoreboard, monitor):
+    scoreboard.add_interface(monitor, monitor.expected, reorder_depth=2)
+    for n in range(3):
+        monitor.add_expected(Trx(n, n))
+    for n in (2, 0, 1):
+        monitor._recv(Trx(n, n))
+    assert scoreboard.errors == 0 and not monitor.expected
+
+
+def test_per_interface_funcs(scoreboard):
+    doubled, plain = make_monitor('a'), make_monitor('b')
+    scoreboard.add_interface(doubled, doubled.expected, x_fn=lambda trx: Trx(trx.addr, trx.data * 2))
+    scoreboard.add_interface(plain, plain.expected, compare_fn=lambda got, exp: got.addr == exp.addr)
+    doubled.add_expected(Trx(1, 3))
+    doubled._recv(Trx(1, 6))
+    plain.add_expected(Trx(2, 3))
+    plain._recv(Trx(2, 100))  # data isn't compared on this interface
+    assert scoreboard.errors == 0
+
+
+def test_compare_override_called(monitor):
+    class LegacyScoreboard(Scoreboard):
+        calls = []
+
+        def compare(self, got, exp, log, strict_type=True):
+            self.calls.append((got.addr, exp.addr))
+            return True
+
+    scoreboard = LegacyScoreboard(MockEntity('dut', {}))
+    scoreboard.add_interface(monitor, monitor.expected)
+    monitor.add_expected(Trx(1, 1))
+    monitor._recv(Trx(1, 2))
+    assert LegacyScoreboard.calls == [(1, 1)]
+    assert scoreboard.errors == 0
+
+
+def test_compare_default_signature(scoreboard):
+    scoreboard.x_fn = lambda trx: Trx(trx.addr, trx.data + 1)
+    assert scoreboard.compare(Trx(1, 2), Trx(1, 1), logging.getLogger('test'))
+
+
+def test_buffer_compare():
+    compare = BufferCompare(payload=lambda trx: trx.data)
+    a = Trx(0, numpy.arange(8))
+    b = Trx(0, numpy.arange(8))
+    assert compare(a, b)
+    b.data[5] = 0
+    assert not compare(a, b)
+    assert compare.diff(a, b) == '1 of 8 payload elements differ. First at index 5: received 5, expected 0'
+    assert BufferCompare()(b'abc', bytearray(b'abc'))
+    assert 'shape' in BufferCompare().diff(numpy.zeros(2), numpy.zeros(3))
+
+
+def test_buffer_compare_mismatch_reported(monitor, caplog):
+    scoreboard = Scoreboard(MockEntity('dut', {}), fail_immediately=False)
+    scoreboard.add_interface(monitor, monitor.expected, compare_fn=BufferCompare(lambda trx: trx.data))
+    monitor.add_expected(Trx(0, b'\x01\x02'))
+    with caplog.at_level(logging.ERROR):
+        monitor._recv(Trx(0, b'\x01\x03'))
+    assert scoreboard.errors == 1
+    assert 'First at index 1' in caplog.text
+
+
+def double_data(trx):
+    assert type(trx) is Trx  # process prefetch restores trx of the same class
+    return {'addr': trx.addr, 'data': trx.data * 2}
+
+
+@pytest.mark.parametrize('prefetch', ['thread', 'process'])
+def test_prefetch(prefetch):
+    monitor = make_monitor(snapshot_expected=True)
+    scoreboard = Scoreboard(MockEntity('dut', {}))
+    scoreboard.add_interface(monitor, monitor.expected, x_fn=double_data, prefetch=prefetch, strict_type=False,
+                             compare_fn=lambda got, exp: got.to_dict() == exp)
+    trx = Trx()
+    trx.add_rand('addr', list(range(4)))
+    trx.add_constraint(lambda addr: addr != 2)  # unpicklable lambda constraint
+    for n in range(5):
+        trx.randomize()
+        trx.data = n
+        monitor.add_expected(trx)
+    for exp in list(monitor.expected):
+        monitor._recv(Trx(exp.trx.addr, exp.trx.data * 2))
+    scoreboard.shutdown()
+    assert scoreboard.errors == 0 and not monitor.expected
+
+
+def test_process_prefetch_requires_picklable_x_fn(monitor, scoreboard):
+    with pytest.raises(TypeError):
+        scoreboard.add_interface(monitor, monitor.expected, x_fn=lambda trx: trx, prefetch='process')
+    scoreboard.shutdown()
+
+
+def test_keyed_out_of_order(scoreboard, monitor):
+    scoreboard.add_interface(monitor, monitor.expected, key_fn=lambda trx: trx.addr)
+    for n in range(4):
+        monitor.add_expected(Trx(n % 2, n))
+    for addr, data in ((1, 1), (0, 0), (0, 2), (1, 3)):  # same key trx are matched in order
+        monitor._recv(Trx(addr, data))
+    assert scoreboard.errors == 0
+    scoreboard.result
+
+
+def test_keyed_resolves_prefetch_lazily(scoreboard):
+    keyed = KeyedExpected(lambda exp: exp)
+    done, pending = Future(), Future()  # pending background job never finishes
+    done.set_result(0)
+    keyed.add(Prefetched(Trx(0, 0), done))
+    keyed.add(Prefetched(Trx(1, 1), pending))
+    assert len(keyed) == 2
+    exp, expected_val = keyed.pop(0, scoreboard._transform)
+    assert exp.addr == 0 and expected_val == 0
+    assert len(keyed) == 1 and not pending.done()
+    assert [exp.addr for exp in keyed] == [1]
+
+
+def test_keyed_unknown_key(monitor):
+    scoreboard = Scoreboard(MockEntity('dut', {}), fail_immediately=False)
+    scoreboard.add_interface(monitor, monitor.expected, key_fn=lambda trx: trx.addr)
+    monitor.add_expected(Trx(0, 0))
+    monitor._recv(Trx(5, 0))
+    assert scoreboard.errors == 1
+    with pytest.raises(AssertionError):  # trx with key 0 is still expected
+        scoreboard.result
+
+
+def test_keyed_requires_list(scoreboard, monitor):
+    with pytest.raises(TypeError):
+        scoreboard.add_interface(monitor, lambda trx: trx, key_fn=lambda trx: trx.addr)
@@ -0,0 +1,168 @@
+import random
+import types
+
+import cocotb
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_coverage import CoverPoint
+from cocotb_util import cocotb_testbench
+
+from test_coverage import ItemsCoverage
+
+
+class DataTrx(Transaction):
+    __slots__ = ('data',)
+
+    def __init__(self):
+        super().__init__(reset_store_trx_file=False)
+        self.add_rand('data', list(range(64)))
+        self.add_constraint(lambda data: data >= 32)  # half of the bins can't be hit
+
+
+def run_sequencer(tb, **kwargs):
+    for trx in tb.coverage_sequencer(DataTrx, **kwargs):
+        tb.coverage.collect(trx)
+        assert tb.runs < 1000, "Sequencer doesn't stop"
+
+
+def test_coverage_sequencer_skips_unreachable(cov_name):
+    random.seed(1)
+    cp = CoverPoint(f'{cov_name}.data', field='data', xf=lambda trx: trx.data, bins=list(range(64)))
+    tb = cocotb_testbench.TestBench()
+    tb.coverage = ItemsCoverage([cp])
+    run_sequencer(tb)
+    assert cp.uncovered_bins == set(range(32)) == cp._unreachable
+    assert cp.cover_percentage == 50 and cp.reachable_percentage == 100
+    assert tb.runs < 32 * 2 + 32  # every reachable bin is targeted, every unreachable one is tried once
+
+
+def test_coverage_sequencer_goal(cov_name):
+    random.seed(2)
+    cp = CoverPoint(f'{cov_name}.data', field='data', xf=lambda trx: trx.data, bins=list(range(32, 64)))
+    tb = cocotb_testbench.TestBench()
+    tb.coverage = ItemsCoverage([cp])
+    run_sequencer(tb, goal=50)
+    assert 50 <= cp.cover_percentage < 100
+
+
+def run_coro(coro):
+    """Run coroutine which doesn't wait for simulator triggers"""
+    with pytest.raises(StopIteration):
+        coro.send(None)
+
+
+def add_agents(tb, *names):
+    for name in names:
+        tb.add_agent(types.SimpleNamespace(name=name, monitor=None, driver=None), Trx=DataTrx)
+
+
+def test_max_runs_per_agent():
+    tb = cocotb_testbench.TestBench()
+    tb.max_runs = 3
+    add_agents(tb, 'a', 'b')
+    for name in tb.agents:
+        run_coro(tb.run_agent(name))
+    assert tb.agent_runs == {'a': 3, 'b': 3} and tb.runs == 6
+
+
+def test_overridden_stop_for_every_agent():
+    class StopTestBench(cocotb_testbench.TestBench):
+        def stop(self):
+            return self.runs >= 5
+
+    tb = StopTestBench()
+    add_agents(tb, 'a', 'b')
+    for name in tb.agents:
+        run_coro(tb.run_agent(name))
+    assert tb.agent_runs == {'a': 5, 'b': 0}
+
+
+class LoopTask(object):
+    def __init__(self, coro):
+        self.coro = coro
+        self._done = False
+
+    def done(self):
+        return self._done
+
+    def step(self):
+        if not self._done:
+            try:
+                self.coro.send(None)
+            except StopIteration:
+                self._done = True
+
+    def __await__(self):
+        while not self._done:
+            yield
+
+
+class LoopScheduler(object):
+    """Round-robin stand-in of cocotb scheduler: every await passes control to next task (triggers aren't waited)"""
+    _current_task = None
+
+    def __init__(self):
+        self.tasks = []
+
+    def start_soon(self, coro):
+        self.tasks.append(LoopTask(coro))
+        return self.tasks[-1]
+
+    def run(self, coro, max_rounds: int = 10000):
+        main = self.start_soon(coro)
+        for _ in range(max_rounds):
+            for task in list(self.tasks):
+                self._current_task = task
+                task.step()
+            if main.done():
+                return
+        raise AssertionError("Tasks don't finish")
+
+
+class Join(object):
+    def __init__(self, *tasks):
+        self.tasks = tasks
+
+    def __await__(self):
+        while not all(task.done() for task in self.tasks):
+            yield
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = LoopScheduler()
+    monkeypatch.setattr(cocotb, 'scheduler', scheduler)
+    monkeypatch.setattr(cocotb, 'start_soon', scheduler.start_soon)
+    monkeypatch.setattr(cocotb_testbench, 'Combine', Join)
+    return scheduler
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_run_coverage_sequencer(cov_name, scheduler, batch):
+    """Agent which never awaits: coverage directing next trx is up to date in both collection modes"""
+    random.seed(3)
+    cp = CoverPoint(f'{cov_name}.data', field='data', xf=lambda trx: trx.data, bins=list(range(64)))
+    tb = cocotb_testbench.TestBench()
+    tb.coverage = ItemsCoverage([cp])
+    tb.coverage_batch = batch
+    tb.add_agent(types.SimpleNamespace(name='a', monitor=None, driver=None),
+                 sequencer=lambda: tb.coverage_sequencer(DataTrx, lambda: tb.runs >= 1000))
+    scheduler.run(tb.run())
+    assert cp.reachable_percentage == 100
+    assert tb.runs < 32 * 2 + 32
+
+
+def test_overridden_collect_called(cov_name, scheduler):
+    class TrxCoverage(ItemsCoverage):
+        def collect(self, trx):
+            collected.append(trx.data)
+
+    collected = []
+    tb = cocotb_testbench.TestBench()
+    tb.coverage = TrxCoverage([CoverPoint(f'{cov_name}.data', bins=[0])])
+    tb.coverage_batch = True
+    tb.max_runs = 3
+    add_agents(tb, 'a')
+    scheduler.run(tb.run())
+    assert len(collected) == 3 and all(data >= 32 for data in collected)
@@ -0,0 +1,62 @@
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction, TrxPool
+from cocotb_util.cocotb_recorder import TrxRecorder
+
+
+class BusTrx(Transaction):
+    __slots__ = ('addr', 'data')
+
+
+@pytest.fixture
+def stored(tmp_path, request):
+    """Trx class storing to temp file in given format and 5 stored trx"""
+    fmt = request.param
+    fname = str(tmp_path / f'store_trx.{fmt}')
+    trx = BusTrx(store_trx=True, store_trx_fname=fname, store_trx_fmt=fmt)
+    for n in range(5):
+        trx.addr, trx.data = n, n * 10
+        trx.store_to_file()
+    yield fname, fmt
+    TrxRecorder.close_all()
+
+
+@pytest.mark.parametrize('stored', ['json', 'bin'], indirect=True)
+def test_load_from_file(stored):
+    fname, fmt = stored
+    trx = BusTrx(store_trx_fname=fname, store_trx_fmt=fmt, reset_store_trx_file=False)
+    loaded = []
+    for _ in range(5):
+        trx.load_from_file()
+        loaded.append(trx.to_dict())
+    assert loaded == [{'addr': n, 'data': n * 10} for n in range(5)]
+
+
+@pytest.mark.parametrize('stored', ['json', 'bin'], indirect=True)
+def test_seek_and_replay(stored):
+    fname, fmt = stored
+    trx = BusTrx(store_trx_fname=fname, store_trx_fmt=fmt, reset_store_trx_file=False)
+    assert trx.num_stored_trx() == 5
+    trx.seek_trx(3)
+    trx.load_from_file()
+    assert trx.addr == 3
+    assert [t.addr for t in trx.replay_from_file(1, 3)] == [1, 2]
+    assert list(trx.replay_from_file(4, 2)) == []
+
+
+def test_items_from_slots():
+    trx = BusTrx(reset_store_trx_file=False)
+    assert trx._items == ('addr', 'data')
+    trx.addr, trx.data = 1, 2
+    assert trx.to_dict() == {'addr': 1, 'data': 2}
+
+
+def test_pool_snapshot_recycles():
+    pool = TrxPool()
+    trx = BusTrx(reset_store_trx_file=False)
+    trx.addr, trx.data = 1, 2
+    snapshot = trx.snapshot(pool)
+    assert snapshot is not trx and snapshot.to_dict() == trx.to_dict()
+    pool.release(snapshot)
+    trx.addr = 3
+    assert trx.snapshot(pool) is snapshot and snapshot.addr == 3
@@ -0,0 +1,55 @@
+import numpy
+import pytest
+
+from cocotb_util.cocotb_transaction import Transaction
+from cocotb_util.cocotb_trx_generator import TrxGenerator
+from cocotb_util.cocotb_profiler import profiler
+
+
+class StaticTrx(Transaction):
+    __slots__ = ('addr', 'data')
+
+    def __init__(self):
+        super().__init__(reset_store_trx_file=False)
+        self.add_rand('addr', list(range(8)))
+        self.add_rand('data', list(range(16)))
+        self.add_constraint(lambda addr, data: addr < data)
+
+
+class DynamicTrx(StaticTrx):
+    def pre_randomize(self):  # constraints aren't static: trx are randomized one by one
+        pass
+
+
+@pytest.mark.parametrize('Trx, static', [(StaticTrx, True), (DynamicTrx, False)])
+def test_randomize(Trx, static):
+    generator = TrxGenerator(Trx(), batch_size=4, prefetch=1)
+    assert generator.static == static
+    profiler.reset()
+    for _ in range(10):
+        generator.randomize()
+        assert generator.trx.addr < generator.trx.data
+    generator.stop()
+    assert profiler.stages['randomize'].calls == 10  # every trx is measured once
+
+
+def test_reproducible_batches():
+    sequences = []
+    for _ in range(2):
+        numpy.random.seed(1)
+        generator = TrxGenerator(StaticTrx(), batch_size=3)
+        sequence = []
+        for _ in range(7):
+            generator.randomize()
+            sequence.append(generator.trx.to_dict())
+        sequences.append(sequence)
+    assert sequences[0] == sequences[1]
+
+
+def test_constraints_changed_mid_batch():
+    generator = TrxGenerator(StaticTrx(), batch_size=16)
+    generator.randomize()
+    generator.trx.add_constraint(lambda addr: addr == 3)
+    for _ in range(20):
+        generator.randomize()
+        assert generator.trx.addr == 3 and generator.trx.data > 3